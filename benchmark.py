@@ -0,0 +1,244 @@
+"""Throughput benchmarks for the simulation and the draw path.
+
+    python benchmark.py --output results.json
+    python benchmark.py --compare baseline.json
+
+Rendering runs in an offscreen context; on a machine without a display set
+PYOPENGL_PLATFORM=egl (and EGL_PLATFORM=surfaceless for Mesa), or pass
+--no-render. In compare mode the exit status is 1 if any result is worse
+than the baseline by more than the tolerance.
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from simulation.arena import Arena
+from simulation.teams import RED, TEAM_COLORS
+
+DRONE_COUNTS = [2, 16, 128]
+
+def best_time(fn, repeats):
+    """Fastest of several runs of fn(), in seconds"""
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def arena_size(num_drones):
+    """The standard arena, grown until num_drones / 2 drones fit on each side"""
+    width, height, depth = 36, 10, 18
+    while True:
+        try:
+            Arena(width, height, depth).spawn_poses(RED, num_drones // 2)
+            return width, height, depth
+        except ValueError:
+            width += 8
+            depth += 4
+
+def random_actions(num_steps, num_drones, seed=0):
+    # Mostly forward so drones actually meet, with random bursts of everything else
+    rng = np.random.default_rng(seed)
+    actions = np.where(rng.random((num_steps, num_drones)) < 0.3,
+                       rng.integers(0, 64, (num_steps, num_drones)), 1)
+    return actions.tolist()
+
+def bench_steps(num_drones, num_steps, repeats):
+    arena = Arena.create_default(*arena_size(num_drones), team_size=num_drones // 2)
+    actions = random_actions(num_steps, num_drones)
+
+    def run():
+        arena.reset_game()
+        for tick_actions in actions:
+            arena.step(tick_actions)
+    return num_steps * num_drones / best_time(run, repeats)
+
+def bench_collisions(num_drones, num_steps, repeats):
+    """Microseconds per tick spent on every drone's obstacle and drone collision checks"""
+    arena = Arena.create_default(*arena_size(num_drones), team_size=num_drones // 2)
+    # Check from a spread of mid-game positions; nobody carries a flag, so the checks have no side effects
+    actions = random_actions(200, num_drones)
+    for tick_actions in actions:
+        arena.step(tick_actions)
+    for drone in arena.drones:
+        drone.captured_flag = None
+    for flag in arena.flags:
+        flag.carrier = None
+    arena.rebuild_grids()
+    drones = arena.drones
+
+    def run():
+        for _ in range(num_steps):
+            for drone in drones:
+                x, y, z = drone.position
+                drone.check_obstacle_collision(x, y, z)
+                drone.check_drone_collision(x, y, z)
+    return best_time(run, repeats) / num_steps * 1e6
+
+def bench_reset(num_drones, repeats):
+    """Microseconds per Arena.reset_game()"""
+    arena = Arena.create_default(*arena_size(num_drones), team_size=num_drones // 2)
+    count = 1000
+
+    def run():
+        for _ in range(count):
+            arena.reset_game()
+    return best_time(run, repeats) / count * 1e6
+
+def bench_rays(num_drones, num_casts, repeats):
+    """Microseconds per RaySensor.cast() of 16 rays for every drone"""
+    from simulation.ray_sensor import RaySensor
+
+    arena = Arena.create_default(*arena_size(num_drones), team_size=num_drones // 2)
+    for tick_actions in random_actions(200, num_drones):
+        arena.step(tick_actions)
+    sensor = RaySensor(arena, num_rays=16)
+
+    def run():
+        for _ in range(num_casts):
+            sensor.cast()
+    return best_time(run, repeats) / num_casts * 1e6
+
+def bench_draw(num_drones, num_frames, repeats, instanced):
+    """OffscreenRenderer.render() frames per second of a fixed mid-game state"""
+    from components.environment import Environment
+    from components.drone import Drone
+    from components.home_base import HomeBase
+    from components.flag import Flag
+    from utils.offscreen_renderer import OffscreenRenderer
+
+    environment = Environment(*arena_size(num_drones))
+    environment.set_teams(
+        [[Drone(color=color, size=0.5) for _ in range(num_drones // 2)] for color in TEAM_COLORS],
+        [HomeBase(color=color, size=2) for color in TEAM_COLORS],
+        [Flag(color=color, size=0.5) for color in TEAM_COLORS],
+    )
+    if instanced:
+        environment.enable_instancing()
+    # Spread the drones out first; only drawing is timed, not stepping
+    for tick_actions in random_actions(200, num_drones):
+        environment.step(tick_actions)
+    renderer = OffscreenRenderer(width=800, height=600)
+
+    def run():
+        for _ in range(num_frames):
+            renderer.render(environment)
+        renderer.flush()
+    fps = num_frames / best_time(run, repeats)
+    renderer.release()
+    environment.release()
+    return fps
+
+def run_benchmarks(quick=False, render=True):
+    scale = 0.2 if quick else 1.0
+    repeats = 3 if quick else 5
+    results = {}
+
+    def add(name, value, unit, higher_is_better):
+        results[name] = {'value': value, 'unit': unit, 'higher_is_better': higher_is_better}
+        print(f"{name:<32} {value:14.1f} {unit}", flush=True)
+
+    for num_drones in DRONE_COUNTS:
+        steps = max(50, int(20000 * scale / num_drones))
+        add(f'steps/{num_drones}_drones', bench_steps(num_drones, steps, repeats), 'drone-steps/s', True)
+    for num_drones in DRONE_COUNTS:
+        steps = max(20, int(5000 * scale / num_drones))
+        add(f'collision/{num_drones}_drones', bench_collisions(num_drones, steps, repeats), 'us/tick', False)
+    for num_drones in DRONE_COUNTS:
+        add(f'reset/{num_drones}_drones', bench_reset(num_drones, repeats), 'us/reset', False)
+    for num_drones in DRONE_COUNTS:
+        casts = max(10, int(2000 * scale / num_drones))
+        add(f'rays/{num_drones}_drones', bench_rays(num_drones, casts, repeats), 'us/cast', False)
+
+    renderer = None
+    if render:
+        from utils.gl_context import create_offscreen_context
+        from OpenGL.GL import glGetString, GL_RENDERER, GL_VERSION
+        create_offscreen_context()
+        renderer = f"{glGetString(GL_RENDERER).decode()} ({glGetString(GL_VERSION).decode()})"
+        frames = max(10, int(200 * scale))
+        for num_drones in DRONE_COUNTS:
+            for instanced in (False, True):
+                name = f"draw/{num_drones}_drones{'_instanced' if instanced else ''}"
+                add(name, bench_draw(num_drones, frames, repeats, instanced), 'frames/s', True)
+    return results, renderer
+
+def metadata(renderer):
+    import pygame
+    import OpenGL
+
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        'commit': commit,
+        'python': sys.version.split()[0],
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'processor': platform.processor(),
+        'cpu_count': os.cpu_count(),
+        'numpy': np.__version__,
+        'pygame': pygame.version.ver,
+        'pyopengl': OpenGL.__version__,
+        'gl_renderer': renderer,
+    }
+
+def compare(results, baseline, tolerance):
+    """Print the change of every result against the baseline; returns the names that regressed"""
+    regressions = []
+    print(f"\n{'benchmark':<32} {'baseline':>12} {'current':>12} {'change':>8}")
+    for name, result in results.items():
+        base = baseline['results'].get(name)
+        if base is None:
+            print(f"{name:<32} {'-':>12} {result['value']:12.1f}      new")
+            continue
+        change = result['value'] / base['value'] - 1.0 if base['value'] else 0.0
+        # Express every change so that negative means slower
+        worse = -change if result['higher_is_better'] else change
+        flag = ''
+        if worse > tolerance:
+            flag = '  REGRESSION'
+            regressions.append(name)
+        print(f"{name:<32} {base['value']:12.1f} {result['value']:12.1f} {change:+8.1%}{flag}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulation and rendering benchmarks")
+    parser.add_argument('--output', metavar='PATH', help="write results and machine metadata as JSON")
+    parser.add_argument('--compare', metavar='BASELINE', help="flag regressions against a stored results file")
+    parser.add_argument('--tolerance', type=float, default=0.15,
+                        help="allowed slowdown before a result counts as a regression (default 0.15)")
+    parser.add_argument('--quick', action='store_true', help="fewer iterations, for a rough check")
+    parser.add_argument('--no-render', action='store_true', help="skip the benchmarks that need OpenGL")
+    args = parser.parse_args()
+
+    results, renderer = run_benchmarks(quick=args.quick, render=not args.no_render)
+    report = {'metadata': metadata(renderer), 'results': results}
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if baseline['metadata'].get('machine') != report['metadata']['machine']:
+            print("Warning: baseline was recorded on a different kind of machine")
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) beyond {args.tolerance:.0%}")
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
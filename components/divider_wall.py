@@ -1,24 +1,42 @@
 from OpenGL.GL import *
 from OpenGL.GLU import *
+from simulation.divider_wall_body import DividerWallBody
+from utils.display_list import DisplayList
 from .game_object import GameObject
 
-class DividerWall(GameObject):
+class DividerWall(DividerWallBody, GameObject):
+    translucent = True
+    outline_width = 4.0  # Match box edge thickness
+    __slots__ = ('_faces', '_edges')
+    
     def __init__(self, height=10.0, depth=18.0, thickness=0.005):
-        super().__init__()
-        self.height = height
-        self.depth = depth
-        self.thickness = thickness
-        self.color = (0.0, 0.7, 1.0, 0.03)  # Light blue with very high transparency
-        self.position = [0, -5, 0]  # Move wall down to floor level
+        super().__init__(height, depth, thickness)
+        self._faces = DisplayList(self._draw_faces)
+        self._edges = DisplayList(self._draw_edges)
+        
+    def geometry_key(self):
+        return (self.height, self.depth, self.thickness, self.color)
         
     def draw(self):
         glPushMatrix()
+        if self.registry is not None:
+            self.registry.update_matrices()  # Drawn on its own, outside Environment.queue_scene()
         self.apply_transformations()
+        super().draw()
+        glPopMatrix()
+        
+    def draw_fill(self):
+        # Replay the compiled translucent faces
+        self._faces.draw(self.geometry_key())
         
-        glEnable(GL_BLEND)
-        glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
-        glDisable(GL_LIGHTING)
+    def draw_outline(self):
+        self._edges.draw(self.geometry_key())
         
+    def release(self):
+        self._faces.release()
+        self._edges.release()
+        
+    def _draw_faces(self):
         # Draw translucent wall faces
         glColor4f(*self.color)
         glBegin(GL_QUADS)
@@ -54,9 +72,9 @@ class DividerWall(GameObject):
         glVertex3f(-self.thickness/2, self.height, self.depth/2)
         glEnd()
         
+    def _draw_edges(self):
         # Draw outline with thick black lines to match environment box
         glColor3f(0.0, 0.0, 0.0)  # Solid black like the box edges
-        glLineWidth(4.0)  # Match box edge thickness
         
         # Draw edges
         glBegin(GL_LINES)
@@ -101,8 +119,3 @@ class DividerWall(GameObject):
         glVertex3f(self.thickness/2, 0, -self.depth/2)
         glVertex3f(self.thickness/2, 0, self.depth/2)
         glEnd()
-        
-        # Restore states
-        glEnable(GL_LIGHTING)
-        glDisable(GL_BLEND)
-        glPopMatrix()
@@ -1,31 +1,28 @@
+import numpy as np
 import pygame
 from OpenGL.GL import *
 from OpenGL.GLU import *
+from simulation.arena import Arena
+from utils.display_list import DisplayList
+from utils.render_queue import RenderQueue, FILL_PASS, OUTLINE_PASS
+from utils.instanced_renderer import InstancedRenderer, INSTANCE_FIELDS, drone_mesh, flag_mesh, write_instances, write_pose_instances
 from .game_object import GameObject
-from .drone import Drone
-from .home_base import HomeBase
-from .flag import Flag
 from .divider_wall import DividerWall
 from .rectangle import Rectangle
 
-class Environment(GameObject):
-    def __init__(self, width=20, height=10, depth=20):
-        super().__init__()
-        self.width = width
-        self.height = height
-        self.depth = depth
+class Environment(Arena, GameObject):
+    # Game rules live in Arena; this class only adds mouse handling and drawing
+    divider_wall_class = DividerWall
+    rectangle_class = Rectangle
+
+    def __init__(self, width=20, height=10, depth=20, tick_rate=60):
+        super().__init__(width, height, depth, tick_rate)
         self.rotation_x = 0
         self.rotation_y = 0
         self.last_mouse_pos = None
-        
-        # Store game objects
-        self.drone1 = None
-        self.drone2 = None
-        self.base1 = None
-        self.base2 = None
-        self.flag1 = None
-        self.flag2 = None
-        self.rectangle = None
+        self._container_edges = DisplayList(self._draw_container_edges)
+        self.instanced_renderer = None  # Set by enable_instancing()
+        self.render_queue = RenderQueue()
         
     def handle_mouse(self, event):
         if event.type == pygame.MOUSEBUTTONDOWN:
@@ -48,63 +45,25 @@ class Environment(GameObject):
                 
                 self.last_mouse_pos = current_pos
         
-    def set_game_objects(self, drone1, drone2, base1, base2, flag1, flag2):
-        # Store references to game objects
-        self.drone1 = drone1
-        self.drone2 = drone2
-        self.base1 = base1
-        self.base2 = base2
-        self.flag1 = flag1
-        self.flag2 = flag2
-        self.divider_wall = DividerWall(height=self.height, depth=self.depth)
-        self.rectangle = Rectangle()
-        self.rectangle.position = [0, -3, 0]  # Center the rectangle
-        
-        # Set environment reference in drones for boundary checking
-        self.drone1.environment = self
-        self.drone2.environment = self
-        
-        # Store initial positions and rotations
-        self.initial_positions = {
-            'drone1': {'pos': [-10, -3, 0], 'rot': [0, 90, 0]},   # Left center, face right
-            'drone2': {'pos': [10, -3, 0], 'rot': [0, -90, 0]},    # Right center, face left
-            'flag1': {'pos': [-15, -5, 0]},  # On base1
-            'flag2': {'pos': [15, -5, 0]},   # On base2
-            'base1': {'pos': [-15, -5, 0]},  # Left side
-            'base2': {'pos': [15, -5, 0]}    # Right side
-        }
-        
-        # Set home positions for flags (this is where they'll return to)
-        self.flag1.set_home_position(self.initial_positions['flag1']['pos'])
-        self.flag2.set_home_position(self.initial_positions['flag2']['pos'])
-        
-        # Initialize positions
-        self.reset_game()
-        
-        # Position rectangle in the middle and rotate it
-        self.rectangle.position = [0, -2, 0]  # Center on floor
-        self.rectangle.rotation = [0, 75, 0]  # Rotate 30 degrees left around Y axis
-        
-    def reset_game(self):
-        """Reset all game objects to their initial positions"""
-        # Reset drone positions and rotations
-        self.drone1.position = self.initial_positions['drone1']['pos'].copy()
-        self.drone1.rotation = self.initial_positions['drone1']['rot'].copy()
-        self.drone2.position = self.initial_positions['drone2']['pos'].copy()
-        self.drone2.rotation = self.initial_positions['drone2']['rot'].copy()
-        
-        # Reset flag positions
-        self.flag1.position = self.initial_positions['flag1']['pos'].copy()
-        self.flag2.position = self.initial_positions['flag2']['pos'].copy()
-        
-        # Reset base positions
-        self.base1.position = self.initial_positions['base1']['pos'].copy()
-        self.base2.position = self.initial_positions['base2']['pos'].copy()
-        
-        # Clear captured flags
-        self.drone1.captured_flag = None
-        self.drone2.captured_flag = None
-    
+    def enable_instancing(self):
+        """Draw drones and flags through an InstancedRenderer instead of one by one"""
+        self.instanced_renderer = InstancedRenderer()
+        self.instanced_renderer.add_mesh('drone', drone_mesh(self.drone1))
+        self.instanced_renderer.add_mesh('flag', flag_mesh(self.flag1))
+        self._create_instance_buffers()
+        
+    def _create_instance_buffers(self):
+        # Colours are written once here; each frame only copies poses out of the registry
+        self._drone_instances = np.zeros((len(self.drones), INSTANCE_FIELDS), dtype=np.float32)
+        self._flag_instances = np.zeros((len(self.flags), INSTANCE_FIELDS), dtype=np.float32)
+        write_instances(self._drone_instances, self.drones)
+        write_instances(self._flag_instances, self.flags)
+        
+    def set_teams(self, teams, bases, flags):
+        super().set_teams(teams, bases, flags)
+        if self.instanced_renderer:
+            self._create_instance_buffers()
+        
     def draw(self):
         # Save the current matrix and apply base transformations
         glPushMatrix()
@@ -114,33 +73,73 @@ class Environment(GameObject):
         glRotatef(self.rotation_x, 1, 0, 0)
         glRotatef(self.rotation_y, 0, 1, 0)
         
-        # Draw bases first (they're on the ground)
-        if self.base1 and self.base2:
-            # Draw first base
-            glPushMatrix()
-            self.base1.apply_transformations()
-            self.base1.draw()
-            glPopMatrix()
+        # Queue everything, then draw it sorted into fill, outline and translucent passes
+        self.queue_scene()
+        self.render_queue.flush()
+        
+        glPopMatrix()  # Pop the environment matrix
+        
+    def queue_scene(self):
+        """Fill self.render_queue with this frame's draw calls (in arena space)
+        
+        The queue can be flushed with clear=False to replay the same frame
+        under several cameras without rebuilding it or re-uploading instances.
+        """
+        queue = self.render_queue
+        queue.clear()
+        
+        registry = self.registry
+        registry.update_matrices()  # Only objects that moved get new model matrices
+        
+        # Bases (they're on the ground)
+        for base in self.bases:
+            queue.add_object(base)
             
-            # Draw second base
-            glPushMatrix()
-            self.base2.apply_transformations()
-            self.base2.draw()
-            glPopMatrix()
-        
-        # Draw flags
-        if self.flag1 and self.flag2:
-            glPushMatrix()
-            self.flag1.apply_transformations()
-            self.flag1.draw()
-            glPopMatrix()
+        # Flags
+        if self.instanced_renderer:
+            count = write_pose_instances(self._flag_instances, registry.positions[self.flag_rows],
+                                         registry.rotations[self.flag_rows])
+            self.instanced_renderer.upload('flag', self._flag_instances, count)
+            queue.add(FILL_PASS, self.instanced_renderer.draw_fill, 'flag')
+            queue.add(OUTLINE_PASS, self.instanced_renderer.draw_outline, 'flag', line_width=2.0)
+        else:
+            for flag in self.flags:
+                queue.add_object(flag)
             
-            glPushMatrix()
-            self.flag2.apply_transformations()
-            self.flag2.draw()
-            glPopMatrix()
-        
-        # Draw drones before the wall for proper transparency
+        # Container edges with thick black lines
+        queue.add(OUTLINE_PASS, self._container_edges.draw, (self.width, self.height, self.depth), line_width=4.0)
+        
+        # Drones
+        if self.instanced_renderer:
+            # All drones in one fill call and one outline call
+            count = write_pose_instances(self._drone_instances, registry.positions[self.drone_rows],
+                                         registry.rotations[self.drone_rows])
+            self.instanced_renderer.upload('drone', self._drone_instances, count)
+            queue.add(FILL_PASS, self.instanced_renderer.draw_fill, 'drone')
+            queue.add(OUTLINE_PASS, self.instanced_renderer.draw_outline, 'drone', line_width=2.0)
+        else:
+            for drone in self.drones:
+                queue.add_object(drone)
+            
+        # Rhombus and any other obstacles
+        for obstacle in self.obstacles:
+            if obstacle.visible:
+                queue.add_object(obstacle)
+            
+        # Divider wall is translucent, so it goes in the last pass
+        queue.add_object(self.divider_wall)
+        return queue
+        
+    def release(self):
+        """Free the GL resources of the environment and everything in it"""
+        self._container_edges.release()
+        if self.instanced_renderer:
+            self.instanced_renderer.release()
+            self.instanced_renderer = None
+        for game_object in [*self.bases, *self.flags, *self.drones, *self.obstacles, self.divider_wall]:
+            game_object.release()
+        
+    def _draw_container_edges(self):
         # Define the vertices of the rectangular container
         w, h, d = self.width/2, self.height/2, self.depth/2
         vertices = [
@@ -150,8 +149,7 @@ class Environment(GameObject):
             [-w, h, -d], [w, h, -d], [w, h, d], [-w, h, d]
         ]
 
-        # Draw only edges with thick black lines
-        glLineWidth(4.0)
+        # Draw only edges in black; the render queue sets the thick line width
         glColor3f(0.0, 0.0, 0.0)  # Black color for edges
         
         # Define the edges of the box (12 edges in total)
@@ -170,27 +168,3 @@ class Environment(GameObject):
             for vertex_index in edge:
                 glVertex3fv(vertices[vertex_index])
         glEnd()
-        
-        if self.drone1 and self.drone2:
-            # Draw first drone
-            glPushMatrix()
-            self.drone1.apply_transformations()
-            self.drone1.draw()
-            glPopMatrix()
-            
-            # Draw second drone
-            glPushMatrix()
-            self.drone2.apply_transformations()
-            self.drone2.draw()
-            glPopMatrix()
-            
-        # Draw divider wall
-        self.divider_wall.draw()
-        
-        # Draw rhombus
-        if self.rectangle.visible:
-            glPushMatrix()
-            self.rectangle.draw()
-            glPopMatrix()
-        
-        glPopMatrix()  # Pop the environment matrix
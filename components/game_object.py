@@ -1,22 +1,58 @@
 from OpenGL.GL import *
 from OpenGL.GLU import *
+from OpenGL.raw.GL.VERSION.GL_1_0 import glMultMatrixf as gl_mult_matrix_pointer
+from simulation.entity import Entity
+from utils.gl_state import gl_state
 
-class GameObject:
-    def __init__(self, position=(0, 0, 0), rotation=(0, 0, 0), scale=(1, 1, 1)):
-        self.position = list(position)
-        self.rotation = list(rotation)
-        self.scale = list(scale)
-        
-    def update(self, delta_time):
-        """Update the game object's state"""
+class GameObject(Entity):
+    """Drawable view over an Entity's pose"""
+    __slots__ = ()
+    
+    translucent = False  # Translucent objects are drawn last, with blending
+    outline_width = 2.0
+    
+    def draw_fill(self):
+        """Draw filled geometry in local space (unlit, polygon fill)"""
         pass
         
-    def draw(self):
-        """Draw the game object"""
+    def draw_outline(self):
+        """Draw outline geometry in local space (unlit, polygon mode GL_LINE)"""
+        pass
+        
+    def release(self):
+        """Free any GL resources (display lists) made by drawing; needs the context they were made in"""
         pass
         
+    def draw(self):
+        """Draw the game object on its own; Environment batches fills and outlines instead"""
+        gl_state.disable(GL_LIGHTING)
+        if self.translucent:
+            gl_state.enable(GL_BLEND)
+            gl_state.blend_func(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
+            
+        self.draw_fill()
+        
+        gl_state.line_width(self.outline_width)
+        gl_state.polygon_mode(GL_LINE)
+        self.draw_outline()
+        gl_state.polygon_mode(GL_FILL)
+        
+        if self.translucent:
+            gl_state.disable(GL_BLEND)
+        gl_state.enable(GL_LIGHTING)
+        
     def apply_transformations(self):
-        """Apply position, rotation, and scale transformations"""
+        """Apply position, rotation, and scale transformations
+        
+        Objects in an EntityRegistry multiply in their cached matrix from
+        registry.update_matrices(), which Environment.queue_scene() runs
+        once per frame. Others (e.g. the Environment itself) build it here.
+        """
+        if self.index >= 0:
+            # Unchecked entry point with a raw pointer: PyOpenGL's array handling costs more than the call
+            gl_mult_matrix_pointer(self.registry.matrix_pointers[self.index])
+            return
+            
         # Apply position
         glTranslatef(self.position[0], self.position[1], self.position[2])
         
@@ -1,19 +1,35 @@
 from OpenGL.GL import *
 from OpenGL.GLU import *
+from simulation.home_base_body import HomeBaseBody
+from utils.display_list import DisplayList
 from .game_object import GameObject
 
 import math
 
-class HomeBase(GameObject):
-    def __init__(self, color=(1.0, 0.0, 0.0), size=2):  # Default red color
-        super().__init__()
-        self.color = color
-        self.size = size
+class HomeBase(HomeBaseBody, GameObject):
+    __slots__ = ('segments', '_platform', '_platform_outline')
+    
+    def __init__(self, color=(1.0, 0.0, 0.0), size=2, team=None):  # Default red color
+        super().__init__(color, size, team)
         self.segments = 32  # Number of segments for the circle
+        self._platform = DisplayList(self._draw_platform)
+        self._platform_outline = DisplayList(self._draw_platform_outline)
         
-    def draw(self):
-        glDisable(GL_LIGHTING)
+    def geometry_key(self):
+        return (self.size, self.segments, tuple(self.color))
         
+    def draw_fill(self):
+        # Replay the compiled platform
+        self._platform.draw(self.geometry_key())
+        
+    def draw_outline(self):
+        self._platform_outline.draw(self.geometry_key())
+        
+    def release(self):
+        self._platform.release()
+        self._platform_outline.release()
+        
+    def _draw_platform(self):
         # Platform color (slightly darker than flag)
         platform_color = [c * 0.7 for c in self.color]
         glColor3f(*platform_color)
@@ -28,8 +44,7 @@ class HomeBase(GameObject):
             glVertex3f(x, 0, z)
         glEnd()
         
-        # Draw platform outline
-        glLineWidth(2.0)
+    def _draw_platform_outline(self):
         glColor3f(0.0, 0.0, 0.0)  # Black outline
         glBegin(GL_LINE_LOOP)
         for i in range(self.segments):
@@ -38,5 +53,3 @@ class HomeBase(GameObject):
             z = self.size * math.sin(angle)
             glVertex3f(x, 0, z)
         glEnd()
-        
-        glEnable(GL_LIGHTING)
@@ -1,15 +1,15 @@
 from OpenGL.GL import *
 import pygame
+from simulation.rectangle_body import RectangleBody
+from utils.display_list import DisplayList
 from .game_object import GameObject
 
-class Rectangle(GameObject):
-    def __init__(self):
-        super().__init__()
-        self.visible = True
-        self.height = 6.0  # Height (Y axis)
-        self.width = 8.0  # Width (X axis)
-        self.depth = 3.0  # Depth (Z axis)
-        self.position = [0.0, -5.0, 0.0]  # Start at floor level
+class Rectangle(RectangleBody, GameObject):
+    __slots__ = ('_geometry',)
+    
+    def __init__(self, width=8.0, height=6.0, depth=3.0):
+        super().__init__(width, height, depth)
+        self._geometry = DisplayList(self._draw_geometry)
         
     def draw(self):
         if not self.visible:
@@ -17,11 +17,20 @@ class Rectangle(GameObject):
             
         # Save the current matrix
         glPushMatrix()
+        if self.registry is not None:
+            self.registry.update_matrices()  # Drawn on its own, outside Environment.queue_scene()
         super().apply_transformations()
+        super().draw()
+        glPopMatrix()
+        
+    def draw_fill(self):
+        # Replay the compiled box geometry
+        self._geometry.draw((self.width, self.height, self.depth))
         
-        # Disable lighting for flat color without reflections
-        glDisable(GL_LIGHTING)
+    def release(self):
+        self._geometry.release()
         
+    def _draw_geometry(self):
         # Set an even darker gray color
         gray = [0.25, 0.25, 0.25]  # Very dark gray color
         glColor3f(*gray)
@@ -77,10 +86,3 @@ class Rectangle(GameObject):
         glVertex3f(-half_width, half_height, -half_depth)   # Top back
         
         glEnd()
-        
-        # Restore the matrix and re-enable lighting
-        glPopMatrix()
-        glEnable(GL_LIGHTING)
-        
-    def toggle(self):
-        self.visible = not self.visible
@@ -0,0 +1,85 @@
+"""Run a match without a window, e.g. on a server.
+
+    python headless.py --policy bot --broadcast :7000
+    python headless.py --serve unix:/tmp/agents.sock --broadcast :7000
+
+Every drone is driven by the policy or by remote agents (drones without an
+agent hover). Watch with: python main.py --spectate HOST:7000
+"""
+import argparse
+import time
+
+from simulation import actions
+from simulation.arena import Arena
+from simulation.policies import PolicyRunner, load_policy
+from simulation.agent_server import AgentServer
+from simulation.replay import ReplayRecorder
+from simulation.spectator import SpectatorServer
+
+def run(arena, controller=None, broadcaster=None, recorder=None, num_ticks=None):
+    """Step the arena in real time at its tick rate, for num_ticks ticks or until interrupted"""
+    tick_interval = 1.0 / arena.tick_rate
+    action_list = [actions.NOOP] * len(arena.drones)
+    next_tick = time.perf_counter()
+    tick = 0
+    while num_ticks is None or tick < num_ticks:
+        if controller:
+            controller.collect(action_list)
+        arena.step(action_list)
+        if recorder:
+            recorder.record()
+        if broadcaster:
+            broadcaster.submit()
+        if controller:
+            controller.submit()
+        tick += 1
+
+        # Sleep to the next tick; after a stall, carry on from now rather than catch up
+        next_tick += tick_interval
+        delay = next_tick - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        else:
+            next_tick = time.perf_counter()
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless 3D drone capture-the-flag")
+    parser.add_argument('--team-size', type=int, default=1, help="drones per team")
+    parser.add_argument('--tick-rate', type=int, default=60, help="simulation ticks per second (default 60)")
+    parser.add_argument('--ticks', type=int, help="stop after this many ticks (default: run until interrupted)")
+    controllers = parser.add_mutually_exclusive_group()
+    controllers.add_argument('--policy', metavar='SPEC', help="drive every drone with 'bot' or module:name")
+    controllers.add_argument('--serve', metavar='ADDRESS', help="let remote agents drive the drones, on HOST:PORT or unix:PATH")
+    parser.add_argument('--slow-clients', choices=('hold', 'wait'), default='hold',
+                        help="for remote agents that have not answered: hold their last actions, or wait up to --client-deadline")
+    parser.add_argument('--client-deadline', type=float, default=5.0, metavar='MS',
+                        help="longest wait for remote agents with --slow-clients wait (default 5 ms)")
+    parser.add_argument('--broadcast', metavar='ADDRESS', help="stream the match to spectators on HOST:PORT or unix:PATH")
+    parser.add_argument('--record', metavar='PATH', help="write a replay of the match to PATH")
+    args = parser.parse_args()
+
+    arena = Arena.create_default(team_size=args.team_size, tick_rate=args.tick_rate)
+    drones = range(len(arena.drones))
+    controller = broadcaster = recorder = None
+    try:
+        if args.policy:
+            controller = PolicyRunner(arena, load_policy(args.policy), drones)
+        elif args.serve:
+            controller = AgentServer(arena, drones, slow_clients=args.slow_clients,
+                                     deadline=args.client_deadline / 1000).start(args.serve)
+            print("Serving remote agents on", controller.address)
+        if args.broadcast:
+            broadcaster = SpectatorServer(arena).start(args.broadcast)
+            print("Broadcasting to spectators on", broadcaster.address)
+        if args.record:
+            recorder = ReplayRecorder(args.record, arena)
+        run(arena, controller, broadcaster, recorder, args.ticks)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for part in (controller, broadcaster, recorder):
+            if part:
+                part.close()
+
+if __name__ == "__main__":
+    main()
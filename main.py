@@ -1,3 +1,6 @@
+import argparse
+import time
+
 import pygame
 from pygame.locals import *
 from OpenGL.GL import *
@@ -6,17 +9,63 @@ from components.environment import Environment
 from components.drone import Drone
 from components.home_base import HomeBase
 from components.flag import Flag
+from components.rectangle import Rectangle
+
+from simulation import actions
+from simulation.policies import PolicyRunner, load_policy
+from simulation.agent_server import AgentServer, HOLD
+from simulation.spectator import SpectatorServer, SpectatorFeed
+from simulation.replay import ReplayRecorder, ReplayReader
+from simulation.playback import Playback
+from simulation.interpolation import PoseInterpolator
+from simulation.teams import RED, BLUE
 
 from utils.camera import Camera
 from utils.mouse_handler import MouseHandler
+from utils.gl_state import gl_state
+from utils.frame_timer import FrameTimer
+from utils.timing_hud import TimingHUD
+
+# Keyboard bindings for each drone, as (key, action bit) pairs
+DRONE1_KEYS = [
+    (pygame.K_w, actions.FORWARD),
+    (pygame.K_s, actions.BACKWARD),
+    (pygame.K_q, actions.UPWARD),
+    (pygame.K_e, actions.DOWNWARD),
+    (pygame.K_a, actions.ROTATE_LEFT),
+    (pygame.K_d, actions.ROTATE_RIGHT),
+]
+DRONE2_KEYS = [
+    (pygame.K_UP, actions.FORWARD),
+    (pygame.K_DOWN, actions.BACKWARD),
+    (pygame.K_RSHIFT, actions.UPWARD),
+    (pygame.K_m, actions.DOWNWARD),
+    (pygame.K_LEFT, actions.ROTATE_LEFT),
+    (pygame.K_RIGHT, actions.ROTATE_RIGHT),
+]
+
+# Time-warp factors stepped through with Page Up / Page Down
+TIME_WARP_STEPS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000]
+
+# Phases of a frame in Game.run, as timed by the F3 overlay
+FRAME_PHASES = ['events', 'update', 'draw', 'button', 'hud', 'flip', 'wait']
+EVENTS, UPDATE, DRAW, BUTTON, HUD, FLIP, WAIT = range(len(FRAME_PHASES))
 
 class Game:
-    def __init__(self):
+    # With instancing=None, matches of at least this many drones draw them instanced
+    # (per-object drawing is a little faster for a 1v1, instancing well ahead by 16)
+    instancing_min_drones = 8
+    
+    def __init__(self, team_size=1, record_path=None, replay_path=None, show_timing=False, tick_rate=60,
+                 policy=None, keyboard_drones=2, async_policy=True, serve_address=None,
+                 slow_clients=HOLD, client_deadline=0.005, broadcast_address=None, spectate_address=None,
+                 instancing=None):
         pygame.init()
         self.screen_width = 800
         self.screen_height = 600
         pygame.display.set_mode((self.screen_width, self.screen_height), DOUBLEBUF | OPENGL)
-        pygame.display.set_caption("3D Drone Environment")
+        self.caption = "3D Drone Environment"
+        pygame.display.set_caption(self.caption)
         
         # Initialize the clock for frame rate control
         self.clock = pygame.time.Clock()
@@ -30,25 +79,99 @@ class Game:
         
         self.setup_gl()
         
+        # A replay or a spectator stream brings its own arena size and teams (red team first)
+        self.replay = ReplayReader(replay_path) if replay_path else None
+        self.feed = SpectatorFeed(spectate_address) if spectate_address else None
+        source = self.replay or self.feed
+        if source:
+            arena_size = source.arena_size
+            tick_rate = source.tick_rate  # Play back in real time
+            red_size, blue_size = ((source.teams == team).sum() for team in (RED, BLUE))
+        else:
+            arena_size = (36, 10, 18)  # Adjusted container dimensions
+            red_size = blue_size = team_size
+        
         # Create game objects
-        self.environment = Environment(36, 10, 18)  # Adjusted container dimensions
+        self.environment = Environment(*arena_size, tick_rate=tick_rate)
         self.camera = Camera()
         self.camera.position = [0.0, 5.0, 30.0]  # Set initial camera position
         
-        # Create game objects
-        drone1 = Drone(color=(1.0, 0.0, 0.0), size=0.5)  # Red drone
-        drone2 = Drone(color=(0.0, 0.0, 1.0), size=0.5)  # Blue drone
+        # Create game objects, one list of drones a side
+        red_drones = [Drone(color=(1.0, 0.0, 0.0), size=0.5) for _ in range(red_size)]  # Red drones
+        blue_drones = [Drone(color=(0.0, 0.0, 1.0), size=0.5) for _ in range(blue_size)]  # Blue drones
         base1 = HomeBase(color=(1.0, 0.0, 0.0), size=2)  # Red base
         base2 = HomeBase(color=(0.0, 0.0, 1.0), size=2)  # Blue base
         flag1 = Flag(color=(1.0, 0.0, 0.0), size=0.5)  # Red flag
         flag2 = Flag(color=(0.0, 0.0, 1.0), size=0.5)  # Blue flag
         
         # Set up all game objects in environment
-        self.environment.set_game_objects(drone1, drone2, base1, base2, flag1, flag2)
+        self.environment.set_teams([red_drones, blue_drones], [base1, base2], [flag1, flag2])
+        if instancing is None:
+            instancing = len(self.environment.drones) >= self.instancing_min_drones
+        if instancing:
+            self.environment.enable_instancing()
+        
+        # A spectator stream's obstacles are sized by its header; the first is the rectangle
+        if self.feed:
+            rectangle = self.environment.rectangle
+            rectangle.width, rectangle.height, rectangle.depth = (float(v) for v in self.feed.obstacle_sizes[0])
+            extra_obstacles = [Rectangle(*(float(v) for v in size)) for size in self.feed.obstacle_sizes[1:]]
+            if extra_obstacles:
+                self.environment.add_obstacles(extra_obstacles)
+            self.feed.start(self.environment)
+        
+        # The keyboard drives the first drone of each team (or of just the first, or
+        # neither); a policy or remote agents, if given, drive all the others,
+        # otherwise they hover in place
+        self.actions = [actions.NOOP] * len(self.environment.drones)
+        self.drone2_index = self.environment.drones.index(self.environment.drone2)
+        self.keyboard = [(0, DRONE1_KEYS), (self.drone2_index, DRONE2_KEYS)][:keyboard_drones]
+        keyboard_indices = {index for index, _ in self.keyboard}
+        other_indices = [i for i in range(len(self.actions)) if i not in keyboard_indices]
+        self.controller = None  # Has submit() and collect(actions), like PolicyRunner
+        if policy is not None and other_indices and not source:
+            self.controller = PolicyRunner(self.environment, policy, other_indices, asynchronous=async_policy)
+        elif serve_address is not None and other_indices and not source:
+            self.controller = AgentServer(self.environment, other_indices, slow_clients=slow_clients,
+                                          deadline=client_deadline).start(serve_address)
+            print("Serving remote agents on", self.controller.address, "for drones", other_indices)
+        
+        # Optionally log every tick to a replay file
+        self.recorder = ReplayRecorder(record_path, self.environment) if record_path else None
+        
+        # In playback mode the replay drives the environment instead of the keyboard
+        self.playback = Playback(self.replay, self.environment) if self.replay else None
+        
+        # Optionally stream every tick to spectators
+        self.broadcaster = None
+        if broadcast_address:
+            self.broadcaster = SpectatorServer(self.environment).start(broadcast_address)
+            print("Broadcasting to spectators on", self.broadcaster.address)
+        
+        # Frame timing overlay; None while it is off, so the frame loop skips all timing
+        self.frame_timer = None
+        self.timing_hud = None
+        if show_timing:
+            self.toggle_timing()
         
         print("Environment created with dimensions:", self.environment.width, self.environment.height, self.environment.depth)
-        print("Drone 1 position:", self.environment.drone1.position)
-        print("Drone 2 position:", self.environment.drone2.position)
+        print("Drone 1 position:", list(self.environment.drone1.position))
+        print("Drone 2 position:", list(self.environment.drone2.position))
+        
+        # The simulation advances in fixed ticks, whatever the frame rate;
+        # frames draw poses interpolated between the last two ticks
+        self.tick_interval = 1.0 / tick_rate
+        self.max_frame_time = 0.25  # Game time dropped per frame after a stall, rather than catching up
+        self.accumulator = 0.0
+        self.interpolator = PoseInterpolator(self.environment)
+        
+        # Time warp runs time_warp ticks per tick of wall-clock time, within
+        # max_update_time seconds of simulation work per frame
+        self.time_warp = 1
+        self.max_update_time = 0.012
+        self.sim_rate = 0.0  # Measured ticks per second of wall-clock time
+        self.rate_ticks = 0
+        self.rate_start = time.perf_counter()
         
         self.last_time = pygame.time.get_ticks()
 
@@ -61,10 +184,10 @@ class Game:
         gluPerspective(45, (800/600), 0.1, 100.0)
         
         # Enable depth testing and lighting
-        glEnable(GL_DEPTH_TEST)
-        glEnable(GL_LIGHTING)
-        glEnable(GL_LIGHT0)
-        glEnable(GL_COLOR_MATERIAL)
+        gl_state.enable(GL_DEPTH_TEST)
+        gl_state.enable(GL_LIGHTING)
+        gl_state.enable(GL_LIGHT0)
+        gl_state.enable(GL_COLOR_MATERIAL)
         
         # Set up light position and properties
         glLight(GL_LIGHT0, GL_POSITION, (5.0, 5.0, 5.0, 1.0))
@@ -84,6 +207,12 @@ class Game:
             elif event.type == pygame.MOUSEWHEEL:
                 self.camera.handle_scroll(event.y)  # Trackpad/mouse wheel zoom
             elif event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_F3:
+                    self.toggle_timing()
+                elif event.key in (pygame.K_PAGEUP, pygame.K_PAGEDOWN):
+                    self.change_time_warp(1 if event.key == pygame.K_PAGEUP else -1)
+                if self.playback:
+                    self.handle_playback_key(event.key)
                 self.camera.handle_key(event.unicode.encode())            # Handle mouse events for environment rotation
             if event.type == pygame.MOUSEBUTTONDOWN or event.type == pygame.MOUSEMOTION or event.type == pygame.MOUSEBUTTONUP:
                 # First check button interaction
@@ -103,18 +232,84 @@ class Game:
                 pass  # We'll handle movement in the update loop
         return True
 
+    def toggle_timing(self):
+        if self.frame_timer:
+            self.frame_timer = None
+            self.timing_hud = None
+        else:
+            self.frame_timer = FrameTimer(FRAME_PHASES)
+            self.timing_hud = TimingHUD(self.frame_timer, self.screen_width, self.screen_height)
+            
+    def change_time_warp(self, steps):
+        index = TIME_WARP_STEPS.index(self.time_warp) + steps
+        self.time_warp = TIME_WARP_STEPS[max(0, min(len(TIME_WARP_STEPS) - 1, index))]
+        
+    def handle_playback_key(self, key):
+        # Space pauses, [ and ] change speed, R reverses, arrows step a tick,
+        # Home/End and 0-9 seek (digit n jumps to n tenths of the match)
+        playback = self.playback
+        if key == pygame.K_SPACE:
+            playback.toggle_pause()
+        elif key == pygame.K_RIGHTBRACKET:
+            playback.faster()
+        elif key == pygame.K_LEFTBRACKET:
+            playback.slower()
+        elif key == pygame.K_r:
+            playback.reverse()
+        elif key == pygame.K_RIGHT:
+            playback.step(1)
+        elif key == pygame.K_LEFT:
+            playback.step(-1)
+        elif key == pygame.K_HOME:
+            playback.seek(0)
+        elif key == pygame.K_END:
+            playback.seek(playback.num_ticks - 1)
+        elif pygame.K_0 <= key <= pygame.K_9:
+            playback.seek((key - pygame.K_0) * playback.num_ticks // 10)
+
     def run(self):
         while True:
             current_time = pygame.time.get_ticks()
             delta_time = (current_time - self.last_time) / 1000.0  # Convert to seconds
             self.last_time = current_time
+            
+            # Taken once per frame so toggling mid-frame can't leave a half-timed frame
+            timer = self.frame_timer
+            if timer:
+                timer.start_frame()
 
             if not self.handle_events():
+                if self.controller:
+                    self.controller.close()
+                if self.broadcaster:
+                    self.broadcaster.close()
+                if self.feed:
+                    self.feed.close()
+                if self.recorder:
+                    self.recorder.close()
+                if self.replay:
+                    self.replay.close()
                 pygame.quit()
                 return
+            if timer:
+                timer.lap(EVENTS)
 
-            # Update game state
-            self.update()
+            # Update game state: as many fixed ticks as the (time-warped) elapsed time calls for
+            self.accumulator += min(delta_time, self.max_frame_time) * self.time_warp
+            deadline = time.perf_counter() + self.max_update_time if self.time_warp > 1 else None
+            ticks = 0
+            while self.accumulator >= self.tick_interval:
+                self.interpolator.capture()
+                self.update()
+                self.accumulator -= self.tick_interval
+                ticks += 1
+                if deadline and time.perf_counter() > deadline:
+                    # Out of budget for this frame: drop the backlog rather than fall behind
+                    self.accumulator %= self.tick_interval
+                    break
+            self.update_caption(ticks)
+            if timer:
+                timer.lap(UPDATE)
             
             # Clear the screen and depth buffer
             glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
@@ -126,53 +321,104 @@ class Game:
             # Apply camera transform
             self.camera.apply()
             
-            # Draw the environment
+            # Draw the environment part way between the last two ticks
+            self.interpolator.blend(self.accumulator / self.tick_interval)
             self.environment.draw()
+            self.interpolator.restore()
+            if timer:
+                timer.lap(DRAW)
             
             # Draw the 2D button on top
             self.draw_button()
+            if timer:
+                timer.lap(BUTTON)
+                if self.timing_hud:
+                    self.timing_hud.draw()
+                timer.lap(HUD)
             
             # Swap the display buffers
             pygame.display.flip()
+            if timer:
+                timer.lap(FLIP)
             
-            # Control the frame rate
+            # Cap the render rate; the simulation rate is set by tick_interval
             self.clock.tick(60)
+            if timer:
+                timer.lap(WAIT)
+                timer.end_frame()
 
     def update(self):
+        if self.feed:
+            self.feed.update()
+            return
+        if self.playback:
+            self.playback.update()
+            if self.broadcaster:
+                self.broadcaster.submit()
+            return
+            
         # Get current keyboard state for continuous movement
         keys = pygame.key.get_pressed()
         
-        # Drone 1 controls (WASD)
-        if keys[pygame.K_w]:
-            self.environment.drone1.move_forward()
-        if keys[pygame.K_s]:
-            self.environment.drone1.move_backward()
-        if keys[pygame.K_q]:
-            self.environment.drone1.move_upward()
-        if keys[pygame.K_e]:
-            self.environment.drone1.move_downward()
-        if keys[pygame.K_a]:
-            self.environment.drone1.rotate_left()
-        if keys[pygame.K_d]:
-            self.environment.drone1.rotate_right()
-        
-        # Drone 2 controls (Arrow keys)
-        if keys[pygame.K_UP]:
-            self.environment.drone2.move_forward()
-        if keys[pygame.K_DOWN]:
-            self.environment.drone2.move_backward()
-        if keys[pygame.K_RSHIFT]:
-            self.environment.drone2.move_upward()
-        if keys[pygame.K_m]:
-            self.environment.drone2.move_downward()
-        if keys[pygame.K_LEFT]:
-            self.environment.drone2.rotate_left()
-        if keys[pygame.K_RIGHT]:
-            self.environment.drone2.rotate_right()
+        # Translate keys into per-drone action bitmasks: drone 1 on WASD, drone 2 on the arrow keys
+        for index, key_map in self.keyboard:
+            self.actions[index] = self.read_actions(keys, key_map)
+            
+        # Policy or remote actions for this tick were worked out from the last tick's state
+        if self.controller:
+            self.controller.collect(self.actions)
+        self.environment.step(self.actions)
+        if self.recorder:
+            self.recorder.record()
+        if self.broadcaster:
+            self.broadcaster.submit()
+            
+        # Start on the next tick's actions, which run while this frame is drawn
+        if self.controller:
+            self.controller.submit()
+
+    def update_caption(self, ticks):
+        # Measure the simulation rate over half-second windows
+        self.rate_ticks += ticks
+        now = time.perf_counter()
+        if now - self.rate_start >= 0.5:
+            self.sim_rate = self.rate_ticks / (now - self.rate_start)
+            self.rate_ticks = 0
+            self.rate_start = now
+            
+        if self.playback:
+            playback = self.playback
+            state = "playing" if playback.playing else "paused"
+            direction = "" if playback.direction > 0 else " reverse"
+            caption = f"Replay tick {playback.tick + 1}/{playback.num_ticks} x{playback.speed:g}{direction} ({state})"
+        elif self.feed:
+            feed = self.feed
+            if not feed.connected:
+                caption = "Spectating - stream ended"
+            elif feed.tick is None:
+                caption = "Spectating - waiting for the stream"
+            else:
+                caption = f"Spectating tick {feed.tick} ({feed.backlog} buffered)"
+        else:
+            caption = "3D Drone Environment"
+        if self.time_warp > 1:
+            real_time = self.sim_rate * self.tick_interval
+            caption += f" - time warp x{self.time_warp}: {self.sim_rate:,.0f} ticks/s ({real_time:.0f}x real time)"
+            
+        # Only touch the title bar when the text changes
+        if caption != self.caption:
+            pygame.display.set_caption(caption)
+            self.caption = caption
+
+    def read_actions(self, keys, key_map):
+        action = actions.NOOP
+        for key, bit in key_map:
+            if keys[key]:
+                action |= bit
+        return action
 
     def draw_button(self):
-        # Save OpenGL state
-        glPushAttrib(GL_ALL_ATTRIB_BITS)
+        # Save matrices; GL state goes through the tracker instead of glPushAttrib
         glMatrixMode(GL_PROJECTION)
         glPushMatrix()
         glLoadIdentity()
@@ -182,8 +428,10 @@ class Game:
         glLoadIdentity()
         
         # Disable everything that could interfere with 2D rendering
-        glDisable(GL_LIGHTING)
-        glDisable(GL_DEPTH_TEST)
+        gl_state.disable(GL_LIGHTING)
+        gl_state.disable(GL_DEPTH_TEST)
+        gl_state.polygon_mode(GL_FILL)
+        gl_state.line_width(1.0)
 
         # Draw button background
         button_color = self.button_hover_color if self.button_hover else self.button_color_base
@@ -211,10 +459,41 @@ class Game:
         glPopMatrix()
         glMatrixMode(GL_MODELVIEW)
         glPopMatrix()
-        glPopAttrib()
+        gl_state.enable(GL_DEPTH_TEST)
 
 def main():
-    game = Game()
+    parser = argparse.ArgumentParser(description="3D drone capture-the-flag")
+    parser.add_argument('--team-size', type=int, default=1, help="drones per team")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument('--record', metavar='PATH', help="write a replay of the match to PATH")
+    mode.add_argument('--replay', metavar='PATH', help="play back a match recorded with --record")
+    mode.add_argument('--spectate', metavar='ADDRESS', help="watch a match broadcast on HOST:PORT or unix:PATH")
+    parser.add_argument('--broadcast', metavar='ADDRESS', help="stream the match to spectators on HOST:PORT or unix:PATH")
+    parser.add_argument('--timing', action='store_true', help="start with the frame timing overlay (F3) on")
+    parser.add_argument('--tick-rate', type=int, default=60, help="simulation ticks per second (default 60)")
+    controllers = parser.add_mutually_exclusive_group()
+    controllers.add_argument('--policy', metavar='SPEC',
+                             help="drive the drones off the keyboard with 'bot' (the scripted bot) or module:name (a policy callable)")
+    controllers.add_argument('--serve', metavar='ADDRESS',
+                             help="let remote agents drive the drones off the keyboard, on HOST:PORT or unix:PATH")
+    parser.add_argument('--keyboard-drones', type=int, choices=(0, 1, 2), default=2,
+                        help="keyboard-driven drones: drone 1 (WASD) and drone 2 (arrows), drone 1 only, or none")
+    parser.add_argument('--sync-policy', action='store_true', help="run the policy on the main thread instead of a worker")
+    parser.add_argument('--slow-clients', choices=('hold', 'wait'), default='hold',
+                        help="for remote agents that have not answered: hold their last actions, or wait up to --client-deadline")
+    parser.add_argument('--client-deadline', type=float, default=5.0, metavar='MS',
+                        help="longest wait for remote agents with --slow-clients wait (default 5 ms)")
+    parser.add_argument('--instancing', action=argparse.BooleanOptionalAction,
+                        help=f"draw drones and flags with instanced rendering (default: for {Game.instancing_min_drones} or more drones)")
+    args = parser.parse_args()
+    
+    game = Game(team_size=args.team_size, record_path=args.record, replay_path=args.replay,
+                show_timing=args.timing, tick_rate=args.tick_rate,
+                policy=load_policy(args.policy) if args.policy else None,
+                keyboard_drones=args.keyboard_drones, async_policy=not args.sync_policy,
+                serve_address=args.serve, slow_clients=args.slow_clients,
+                client_deadline=args.client_deadline / 1000, broadcast_address=args.broadcast,
+                spectate_address=args.spectate, instancing=args.instancing)
     game.run()
 
 if __name__ == "__main__":
@@ -0,0 +1,28 @@
+# Per-drone action bitmask. Bits are applied in this order by Arena.step,
+# matching the order the keyboard controls were checked in Game.update.
+NOOP = 0
+FORWARD = 1 << 0
+BACKWARD = 1 << 1
+UPWARD = 1 << 2
+DOWNWARD = 1 << 3
+ROTATE_LEFT = 1 << 4
+ROTATE_RIGHT = 1 << 5
+
+NUM_ACTION_BITS = 6
+ALL_ACTIONS = (1 << NUM_ACTION_BITS) - 1
+
+
+def apply_action(drone, action):
+    """Apply one action bitmask to a drone"""
+    if action & FORWARD:
+        drone.move_forward()
+    if action & BACKWARD:
+        drone.move_backward()
+    if action & UPWARD:
+        drone.move_upward()
+    if action & DOWNWARD:
+        drone.move_downward()
+    if action & ROTATE_LEFT:
+        drone.rotate_left()
+    if action & ROTATE_RIGHT:
+        drone.rotate_right()
@@ -0,0 +1,271 @@
+import asyncio
+import threading
+import time
+
+import numpy as np
+
+from . import actions
+from .capture_flag_env import CaptureFlagEnv, OBS_SIZE
+from .socket_server import SocketServer, open_connection
+
+# Wire format, all little-endian. A client opens with a HELLO followed by the
+# indices of the drones it wants (<u2 each); the server answers with a
+# WELCOME. From then on every frame has a fixed size, known to both ends
+# from the drone count, so frames need no length prefix: the server sends a
+# STATE per tick and the client replies with ACTIONS whenever it likes.
+MAGIC = b'GLAG'
+VERSION = 1
+
+HELLO = np.dtype([
+    ('magic', 'S4'),
+    ('version', '<u2'),
+    ('num_drones', '<u2'),
+])
+
+WELCOME = np.dtype([
+    ('magic', 'S4'),
+    ('version', '<u2'),
+    ('status', '<u2'),
+    ('arena_drones', '<u2'),  # Drones in the whole arena
+    ('obs_size', '<u2'),
+    ('tick_rate', '<u2'),
+    ('arena_size', '<f4', (3,)),  # width, height, depth
+])
+
+# WELCOME status
+STATUS_OK = 0
+STATUS_BAD_HELLO = 1  # Wrong magic or version, or no drones asked for
+STATUS_UNAVAILABLE = 2  # A drone is not remote-controlled or already has a client
+
+def state_dtype(num_drones):
+    """One tick as sent to a client of num_drones drones"""
+    return np.dtype([
+        ('tick', '<u4'),
+        ('scorer', '<i2'),  # Drone (arena index) that carried a flag home this tick, or -1
+        ('obs', '<f4', (num_drones, OBS_SIZE)),  # CaptureFlagEnv observations, in HELLO order
+    ])
+
+def actions_dtype(num_drones):
+    """A client's reply: the tick of the STATE it acted on and one bitmask per drone"""
+    return np.dtype([
+        ('tick', '<u4'),
+        ('actions', 'u1', (num_drones,)),
+    ])
+
+# What collect() does about clients that have not answered the latest state
+HOLD = 'hold'  # Use their last actions straight away
+WAIT = 'wait'  # Wait for them until the deadline, then hold
+
+class _Client:
+    __slots__ = ('writer', 'drones', 'state', 'answered')
+
+    def __init__(self, writer, drones):
+        self.writer = writer
+        self.drones = drones  # Arena indices, in HELLO order
+        self.state = np.zeros(1, dtype=state_dtype(len(drones)))
+        self.answered = -1  # Latest tick whose state has been answered (or skipped)
+
+class AgentServer(SocketServer):
+    """Lets agents in other processes drive an arena's drones over TCP or a Unix socket.
+
+    Works tick by tick like PolicyRunner: submit() after each step encodes
+    every client's STATE frame from one CaptureFlagEnv observation of the
+    arena and queues it for sending; collect() writes the latest actions of
+    all clients into the action list for the next step. The sockets are
+    served by an asyncio loop on a thread of its own, so the caller never
+    blocks on the network: sends are never awaited, and a client whose
+    unsent data passes max_buffer bytes simply misses states until it
+    catches up. With slow_clients=WAIT, collect() waits up to deadline
+    seconds after submit() for every client sent that state to answer.
+    Drones without a client hover.
+    """
+    thread_name = 'agent-server'
+    handshake_timeout = 5.0
+
+    def __init__(self, arena, drone_indices=None, slow_clients=HOLD, deadline=0.005, max_buffer=1 << 16):
+        if slow_clients not in (HOLD, WAIT):
+            raise ValueError(f"slow_clients must be {HOLD!r} or {WAIT!r}")
+        super().__init__()
+        self.arena = arena
+        self.env = CaptureFlagEnv(arena)
+        num_drones = len(arena.drones)
+        self.drone_indices = sorted(range(num_drones) if drone_indices is None else drone_indices)
+        self.slow_clients = slow_clients
+        self.deadline = deadline
+        self.max_buffer = max_buffer
+        self.tick = -1  # Last tick submitted
+        self.actions = np.zeros(num_drones, dtype=np.uint8)  # Latest actions of every client, by drone
+
+        self._owner = {}  # Drone index -> client
+        self._clients = []
+        self._condition = threading.Condition()  # Guards the above and actions
+        self._deadline_time = 0.0
+        arena.last_scorer = None  # Set by a flag capture; cleared by submit() once reported
+
+    async def _serve_client(self, reader, writer):
+        client = None
+        try:
+            hello = np.frombuffer(await asyncio.wait_for(reader.readexactly(HELLO.itemsize), self.handshake_timeout),
+                                  dtype=HELLO)[0]
+            count = int(hello['num_drones'])
+            drones = []
+            if count:
+                drones = np.frombuffer(await asyncio.wait_for(reader.readexactly(2 * count), self.handshake_timeout),
+                                       dtype='<u2').tolist()
+            status = STATUS_OK
+            if hello['magic'] != MAGIC or hello['version'] != VERSION or not count:
+                status = STATUS_BAD_HELLO
+            else:
+                with self._condition:
+                    if (len(set(drones)) != count or
+                            any(i not in self.drone_indices or i in self._owner for i in drones)):
+                        status = STATUS_UNAVAILABLE
+                    else:
+                        client = _Client(writer, drones)
+                        client.answered = self.tick  # Nothing to answer before the next state
+                        for i in drones:
+                            self._owner[i] = client
+                        self._clients.append(client)
+            writer.write(self._welcome(status).tobytes())
+            if client is None:
+                return
+
+            frame = np.zeros(1, dtype=actions_dtype(count))
+            frame_bytes = frame.view(np.uint8)
+            while True:
+                frame_bytes[:] = np.frombuffer(await reader.readexactly(frame.itemsize), dtype=np.uint8)
+                with self._condition:
+                    self.actions[drones] = frame['actions'][0] & actions.ALL_ACTIONS
+                    # A tick from the future would stop collect() waiting for the states in between
+                    client.answered = max(client.answered, min(int(frame['tick'][0]), self.tick))
+                    self._condition.notify_all()
+        except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError):
+            pass
+        finally:
+            if client is not None:
+                with self._condition:
+                    self._clients.remove(client)
+                    for i in client.drones:
+                        del self._owner[i]
+                        self.actions[i] = actions.NOOP
+                    self._condition.notify_all()
+
+    def _welcome(self, status):
+        welcome = np.zeros(1, dtype=WELCOME)
+        welcome['magic'] = MAGIC
+        welcome['version'] = VERSION
+        welcome['status'] = status
+        welcome['arena_drones'] = len(self.arena.drones)
+        welcome['obs_size'] = OBS_SIZE
+        welcome['tick_rate'] = round(self.arena.tick_rate)
+        welcome['arena_size'] = (self.arena.width, self.arena.height, self.arena.depth)
+        return welcome
+
+    def submit(self):
+        """Send every client the state after the step just taken"""
+        arena = self.arena
+        self.tick += 1
+        scorer = -1
+        if arena.last_scorer is not None:
+            scorer = arena.drones.index(arena.last_scorer)
+            arena.last_scorer = None  # Report each capture once, as CaptureFlagEnv.step does
+
+        obs = self.env.observe()
+        frames = []
+        with self._condition:
+            self._deadline_time = time.perf_counter() + self.deadline
+            for client in self._clients:
+                state = client.state
+                state['tick'] = self.tick
+                state['scorer'] = scorer
+                state['obs'][0] = obs[client.drones]
+                frames.append((client, state.tobytes()))
+        if frames:
+            self.call_soon(self._send, frames, self.tick)
+
+    def _send(self, frames, tick):
+        for client, frame in frames:
+            transport = client.writer.transport
+            if transport.is_closing():
+                continue
+            if transport.get_write_buffer_size() > self.max_buffer:
+                # Not keeping up; skip this state rather than queue it, and don't wait for an answer
+                with self._condition:
+                    client.answered = max(client.answered, tick)
+                    self._condition.notify_all()
+                continue
+            client.writer.write(frame)
+
+    def collect(self, out):
+        """Write the clients' latest actions into out (indexed by drone)"""
+        with self._condition:
+            if self.slow_clients == WAIT:
+                tick = self.tick
+                self._condition.wait_for(lambda: all(c.answered >= tick for c in self._clients),
+                                         max(0.0, self._deadline_time - time.perf_counter()))
+            for index, action in zip(self.drone_indices, self.actions[self.drone_indices].tolist()):
+                out[index] = action
+        return out
+
+class AgentClient:
+    """asyncio end of the protocol, for agents written in Python.
+
+    state holds the latest STATE frame received (a structured record whose
+    'obs' rows follow the drone order given to connect()).
+    """
+
+    def __init__(self, reader, writer, drones, welcome):
+        self.reader = reader
+        self.writer = writer
+        self.drones = list(drones)
+        self.welcome = welcome
+        self._state = np.zeros(1, dtype=state_dtype(len(self.drones)))
+        self._state_bytes = self._state.view(np.uint8)
+        self.state = self._state[0]
+        self._buffer = bytearray()  # Received bytes not yet taken by receive()
+        self._actions = np.zeros(1, dtype=actions_dtype(len(self.drones)))
+
+    @classmethod
+    async def connect(cls, address, drones):
+        reader, writer = await open_connection(address)
+        hello = np.zeros(1, dtype=HELLO)
+        hello['magic'] = MAGIC
+        hello['version'] = VERSION
+        hello['num_drones'] = len(drones)
+        writer.write(hello.tobytes() + np.asarray(drones, dtype='<u2').tobytes())
+        welcome = np.frombuffer(await reader.readexactly(WELCOME.itemsize), dtype=WELCOME)[0]
+        if welcome['status'] != STATUS_OK:
+            writer.close()
+            raise ConnectionError(f"Agent server refused the connection (status {welcome['status']})")
+        return cls(reader, writer, drones, welcome)
+
+    async def receive(self):
+        """Wait for a STATE; returns self.state, refilled in place.
+
+        States that piled up while the agent was busy are skipped: this is
+        the newest one received so far.
+        """
+        size = self.state.itemsize
+        buffer = self._buffer
+        while len(buffer) < size:
+            data = await self.reader.read(1 << 16)
+            if not data:
+                raise asyncio.IncompleteReadError(bytes(buffer), size)
+            buffer += data
+        end = len(buffer) // size * size
+        self._state_bytes[:] = np.frombuffer(buffer, dtype=np.uint8, count=size, offset=end - size)
+        del buffer[:end]
+        return self.state
+
+    def send(self, action_list, tick=None):
+        """Queue actions for our drones, answering the given tick (by default the latest state's)"""
+        self._actions['tick'] = self.state['tick'] if tick is None else tick
+        self._actions['actions'] = action_list
+        self.writer.write(self._actions.tobytes())
+
+    async def close(self):
+        self.writer.close()
+        try:
+            await self.writer.wait_closed()
+        except ConnectionError:
+            pass
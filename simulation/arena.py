@@ -0,0 +1,254 @@
+import numpy as np
+
+from .entity import Entity
+from .entity_registry import EntityRegistry
+from .drone_body import DroneBody
+from .home_base_body import HomeBaseBody
+from .flag_body import FlagBody
+from .divider_wall_body import DividerWallBody
+from .rectangle_body import RectangleBody
+from .obstacles import OrientedBox, ObstacleTree
+from .distance_field import DistanceField
+from .actions import apply_action
+from .spatial_hash import SpatialHash
+from .teams import RED, NUM_TEAMS, TEAM_COLORS
+
+class Arena(Entity):
+    """Game rules for the capture-the-flag arena, with no display or GL context"""
+
+    # Classes used for the static scene objects; Environment swaps in the drawable ones
+    divider_wall_class = DividerWallBody
+    rectangle_class = RectangleBody
+
+    def __init__(self, width=20, height=10, depth=20, tick_rate=60):
+        super().__init__()
+        self.width = width
+        self.height = height
+        self.depth = depth
+        self.tick_rate = tick_rate  # Simulation ticks per second of game time
+
+        # Store game objects; drones, bases and flags are filled in by set_teams()
+        self.teams = [[] for _ in range(NUM_TEAMS)]  # Drones of each team
+        self.drones = []  # Every drone, red team first
+        self.bases = []  # One per team
+        self.flags = []  # One per team
+        self.drone1 = None  # First drone of each team, for the two-player controls
+        self.drone2 = None
+        self.base1 = None
+        self.base2 = None
+        self.flag1 = None
+        self.flag2 = None
+        self.rectangle = None
+        self.obstacles = []  # Static obstacle bodies; the rectangle, plus any add_obstacles()
+        self.obstacle_tree = ObstacleTree()
+        self._distance_field = None
+        self.distance_field_cache_dir = None  # Directory to keep built fields in, e.g. DEFAULT_CACHE_DIR
+
+        # Shared pose storage, built by set_teams()
+        self.registry = None
+        self.drone_rows = slice(0, 0)  # Rows of the registry holding self.drones
+        self.flag_rows = slice(0, 0)
+
+        # Broadphase grids; cells as large as the capture radius
+        self.drone_grid = SpatialHash(cell_size=DroneBody.capture_radius)
+        self.flag_grid = SpatialHash(cell_size=DroneBody.capture_radius)
+
+        # Incremented on every reset so callers can tell an episode ended
+        self.reset_count = 0
+        # Incremented whenever poses change other than by moving (resets,
+        # returned flags, replay seeks) so drawing can tell not to blend
+        self.jump_count = 0
+        self.last_scorer = None  # Drone that most recently carried a flag home
+        self.reset_pending = False  # Set by a score; the next step() (or reset_game()) resets
+
+    @classmethod
+    def create_default(cls, width=36, height=10, depth=18, team_size=1, tick_rate=60):
+        """Build the standard red vs blue match, with team_size drones a side"""
+        arena = cls(width, height, depth, tick_rate)
+        arena.set_teams(
+            [[DroneBody(color=color, size=0.5) for _ in range(team_size)] for color in TEAM_COLORS],
+            [HomeBaseBody(color=color, size=2) for color in TEAM_COLORS],
+            [FlagBody(color=color, size=0.5) for color in TEAM_COLORS],
+        )
+        return arena
+
+    def set_game_objects(self, drone1, drone2, base1, base2, flag1, flag2):
+        """One drone a side; see set_teams()"""
+        self.set_teams([[drone1], [drone2]], [base1, base2], [flag1, flag2])
+
+    def set_teams(self, teams, bases, flags):
+        """Set up a match; teams, bases and flags are indexed by team (RED, BLUE).
+
+        Each entry of teams is a list of drones of any length. Team membership
+        comes from this layout, not from the objects' colours.
+        """
+        if len(teams) != NUM_TEAMS or len(bases) != NUM_TEAMS or len(flags) != NUM_TEAMS:
+            raise ValueError(f"Expected {NUM_TEAMS} teams, bases and flags")
+
+        # Store references to game objects
+        self.teams = [list(drones) for drones in teams]
+        self.drones = [drone for drones in self.teams for drone in drones]
+        self.bases = list(bases)
+        self.flags = list(flags)
+        for team in range(NUM_TEAMS):
+            for drone in self.teams[team]:
+                drone.team = team
+            self.bases[team].team = team
+            self.flags[team].team = team
+        self.drone1, self.drone2 = (drones[0] if drones else None for drones in self.teams)
+        self.base1, self.base2 = self.bases
+        self.flag1, self.flag2 = self.flags
+        self.divider_wall = self.divider_wall_class(height=self.height, depth=self.depth)
+        self.rectangle = self.rectangle_class()
+
+        # Set environment reference in drones for boundary checking
+        for drone in self.drones:
+            drone.environment = self
+            drone.set_tick_rate(self.tick_rate)
+
+        # Store initial positions and rotations; drones are numbered in self.drones order
+        self.initial_positions = {
+            'flag1': {'pos': [-15, -5, 0]},  # On base1
+            'flag2': {'pos': [15, -5, 0]},   # On base2
+            'base1': {'pos': [-15, -5, 0]},  # Left side
+            'base2': {'pos': [15, -5, 0]}    # Right side
+        }
+        number = 1
+        for team, drones in enumerate(self.teams):
+            for pose in self.spawn_poses(team, len(drones)):
+                self.initial_positions[f'drone{number}'] = pose
+                number += 1
+
+        # Set home positions for flags (this is where they'll return to)
+        self.flag1.set_home_position(self.initial_positions['flag1']['pos'])
+        self.flag2.set_home_position(self.initial_positions['flag2']['pos'])
+
+        # Place everything, then move all poses into one registry (drones first, then flags)
+        for number, drone in enumerate(self.drones, 1):
+            drone.position = self.initial_positions[f'drone{number}']['pos']
+            drone.rotation = self.initial_positions[f'drone{number}']['rot']
+        self.base1.position = self.initial_positions['base1']['pos']
+        self.base2.position = self.initial_positions['base2']['pos']
+
+        # Position rectangle in the middle and rotate it
+        self.rectangle.position = [0, -2, 0]  # Center on floor
+        self.rectangle.rotation = [0, 75, 0]  # Rotate 30 degrees left around Y axis
+        self.obstacles = [self.rectangle]
+
+        self.registry = EntityRegistry()
+        self.drone_rows = self.registry.add(self.drones)
+        self.flag_rows = self.registry.add(self.flags)
+        self.registry.add(self.bases + [self.divider_wall] + self.obstacles)
+        self.start_poses = self.registry.snapshot()
+        self.build_obstacles()
+
+        # Initialize positions
+        self.reset_game()
+
+    def add_obstacles(self, bodies):
+        """Add static obstacles (RectangleBody-like: position, yaw, width, height, depth, visible).
+
+        Call after set_teams(), with the bodies already in place; they keep
+        their poses across resets.
+        """
+        bodies = list(bodies)
+        rows = self.registry.add(bodies)
+        # Extend the start poses with the new rows rather than re-snapshotting the live game
+        self.start_poses = tuple(np.concatenate([start, live[rows]])
+                                 for start, live in zip(self.start_poses, self.registry.snapshot()))
+        self.obstacles += bodies
+        self.build_obstacles()
+
+    def build_obstacles(self):
+        """Precompute the obstacles' transforms and bounding volume hierarchy; call after moving one"""
+        self.obstacle_tree = ObstacleTree(OrientedBox(body, DroneBody.obstacle_buffer) for body in self.obstacles)
+        self._distance_field = None
+
+    @property
+    def distance_field(self):
+        """DistanceField of the obstacles, built (or loaded from distance_field_cache_dir) on first use"""
+        if self._distance_field is None:
+            self._distance_field = DistanceField.for_arena(self, cache_dir=self.distance_field_cache_dir)
+        return self._distance_field
+
+    def set_tick_rate(self, tick_rate):
+        """Change how many ticks make up a second of game time"""
+        self.tick_rate = tick_rate
+        for drone in self.drones:
+            drone.set_tick_rate(tick_rate)
+
+    def spawn_poses(self, team, count):
+        """Start poses for count drones: ranks across the team's half, facing the wall.
+
+        A single drone starts at the centre of its side, 10 units from the
+        wall. Extra drones fill ranks spaced further than the collision
+        radius apart, so none starts out blocked by a teammate.
+        """
+        side = -1 if team == RED else 1
+        spacing = DroneBody.collision_radius + 0.5
+        per_rank = max(1, int((self.depth - 2) / spacing))
+        poses = []
+        for i in range(count):
+            rank, slot = divmod(i, per_rank)
+            in_rank = min(per_rank, count - rank * per_rank)
+            x = side * (10 + rank * spacing)
+            if abs(x) >= self.width / 2:
+                raise ValueError(f"{count} drones do not fit on one side of the arena")
+            z = (slot - (in_rank - 1) / 2) * spacing
+            poses.append({'pos': [x, -3, z], 'rot': [0, -90 * side, 0]})  # Face the other side
+        return poses
+
+    def reset_game(self):
+        """Reset all game objects to their initial positions"""
+        # Drones, flags and bases go back to their start poses in one copy
+        self.registry.restore(self.start_poses)
+
+        # Clear captured flags
+        for drone in self.drones:
+            drone.captured_flag = None
+        for flag in self.flags:
+            flag.carrier = None
+
+        self.rebuild_grids()
+        self.reset_count += 1
+        self.jump_count += 1
+        self.reset_pending = False
+
+    def rebuild_grids(self):
+        """Re-index every drone and flag; call after moving them directly"""
+        self.drone_grid.rebuild(self.drones)
+        self.flag_grid.rebuild(self.flags)
+
+    def return_flag(self, drone):
+        """Send the flag a drone is carrying back to its home position"""
+        flag = drone.captured_flag
+        flag.reset_position()
+        flag.carrier = None
+        self.flag_grid.update(flag)
+        drone.captured_flag = None
+        self.jump_count += 1
+
+    def flag_scored(self, drone):
+        """Called when a drone carries a flag across the divider wall.
+
+        The reset waits for the next step(), so the scoring state can be
+        observed (and drawn) first; the first score of a tick counts.
+        """
+        if self.reset_pending:
+            return
+        self.last_scorer = drone
+        self.reset_pending = True
+
+    def step(self, actions):
+        """Advance the game by one tick.
+
+        actions holds one bitmask from simulation.actions per drone, in the
+        same order as self.drones. Returns True if a flag was carried across
+        the divider wall during this tick; the game then resets at the start
+        of the next step, unless reset_game() is called first.
+        """
+        if self.reset_pending:
+            self.reset_game()
+        for drone, action in zip(self.drones, actions):
+            apply_action(drone, action)
+        return self.reset_pending
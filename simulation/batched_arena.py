@@ -0,0 +1,314 @@
+import math
+
+import numpy as np
+
+from .arena import Arena
+from .actions import FORWARD, BACKWARD, UPWARD, DOWNWARD, ROTATE_LEFT, ROTATE_RIGHT
+
+class BatchedArena:
+    """N independent copies of an Arena stepped together with NumPy.
+
+    State is kept as struct-of-arrays buffers indexed [arena, drone] or
+    [arena, flag], and step() applies the same rules as DroneBody in the same
+    order (drone 1's action bits, then drone 2's), vectorized over arenas.
+    Arenas where a flag is scored are reset in place at the start of the
+    next step(), as Arena does.
+    """
+    # With at least this many obstacles, a distance field lookup picks out the
+    # drones near one before the exact per-obstacle tests
+    field_min_obstacles = 4
+
+    def __init__(self, num_arenas, template=None):
+        if template is None:
+            template = Arena.create_default()
+        self.num_arenas = num_arenas
+        self._read_template(template)
+
+        n = num_arenas
+        self.drone_pos = np.empty((n, 2, 3))
+        self.drone_yaw = np.empty((n, 2))
+        self.carried_flag = np.empty((n, 2), dtype=np.int8)  # Flag index, or -1
+        self.flag_pos = np.empty((n, 2, 3))
+        # Per-arena visibility of each template obstacle; the rectangle is the first
+        self.obstacle_visible = np.array([[body.visible for body in template.obstacles]] * n, dtype=bool)
+        self.rectangle_visible = self.obstacle_visible[:, 0]
+        self.done = np.zeros(n, dtype=bool)  # Arenas where a flag was scored last step; reset by the next
+
+        # Same bit order as simulation.actions.apply_action
+        self._action_handlers = (
+            (FORWARD, self._move_planar, 1.0),
+            (BACKWARD, self._move_planar, -1.0),
+            (UPWARD, self._move_vertical, self.speed),
+            (DOWNWARD, self._move_vertical, -self.speed),
+            (ROTATE_LEFT, self._rotate, self.rotation_speed),
+            (ROTATE_RIGHT, self._rotate, -self.rotation_speed),
+        )
+
+        self.reset()
+
+    def _read_template(self, template):
+        if len(template.teams[0]) != 1 or len(template.teams[1]) != 1:
+            raise ValueError("BatchedArena only supports one drone per team")
+        drone = template.drone1
+        self.speed = drone.speed
+        self.rotation_speed = drone.rotation_speed
+        self.nose_length = drone.size
+        self.collision_radius_sq = drone.collision_radius ** 2
+        self.capture_radius_sq = drone.capture_radius ** 2
+        self.flag_carry_offset = drone.flag_carry_offset
+
+        self.half_width = template.width / 2
+        self.half_height = template.height / 2
+        self.half_depth = template.depth / 2
+        self.wall_x = template.divider_wall.position[0]
+
+        # The same precomputed boxes the template's obstacle tree tests, in obstacle order
+        boxes = {id(box.body): box for box in template.obstacle_tree.boxes}
+        self.obstacle_boxes = [boxes[id(body)] for body in template.obstacles]
+        self.obstacle_field = None
+        if len(self.obstacle_boxes) >= self.field_min_obstacles:
+            self.obstacle_field = template.distance_field
+            # Furthest from a bare box that a single move can still reach its padded one
+            self.field_margin = (self.obstacle_field.error_bound + self.speed +
+                                 drone.obstacle_buffer * math.sqrt(3))
+
+        init = template.initial_positions
+        self.initial_drone_pos = np.array([init['drone1']['pos'], init['drone2']['pos']], dtype=float)
+        self.initial_drone_yaw = np.array([init['drone1']['rot'][1], init['drone2']['rot'][1]], dtype=float)
+        self.flag_home = np.array([template.flag1.home_position, template.flag2.home_position], dtype=float)
+
+        # Index of the flag each drone may capture (flags are indexed by team)
+        self.target_flag = np.array([1 - d.team for d in template.drones])
+
+    def reset(self, indices=None):
+        """Reset the given arenas (all of them by default) like Arena.reset_game"""
+        if indices is None:
+            indices = slice(None)
+        self.drone_pos[indices] = self.initial_drone_pos
+        self.drone_yaw[indices] = self.initial_drone_yaw
+        self.flag_pos[indices] = self.flag_home
+        self.carried_flag[indices] = -1
+        self.done[indices] = False
+
+    def step(self, actions):
+        """Advance every arena by one tick.
+
+        actions is an (num_arenas, 2) integer array of simulation.actions
+        bitmasks. Returns the reused boolean array marking the arenas where a
+        flag was scored during this tick.
+        """
+        actions = np.asarray(actions)
+        if self.done.any():
+            self.reset(np.flatnonzero(self.done))
+        for d in range(2):
+            drone_actions = actions[:, d]
+            for bit, move, amount in self._action_handlers:
+                idx = np.flatnonzero(drone_actions & bit)
+                if idx.size:
+                    move(d, idx, amount)
+        return self.done
+
+    @staticmethod
+    def _slab(start, end, half):
+        # Entry and exit parameters of a segment through |v| <= half, as in
+        # sweep.segment_enters_box; a segment parallel to the slab is all in or all out
+        delta = end - start
+        moving = delta != 0.0
+        inside = np.abs(start) <= half
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ta = (-half - start) / delta
+            tb = (half - start) / delta
+        t_in = np.where(moving, np.minimum(ta, tb), np.where(inside, 0.0, np.inf))
+        t_out = np.where(moving, np.maximum(ta, tb), np.where(inside, 1.0, -np.inf))
+        return t_in, t_out
+
+    def _obstacle_sweep(self, idx, x, y, z, new_x, new_y, new_z):
+        """Vectorized DroneBody.check_obstacle_sweep"""
+        if self.obstacle_field is None:
+            return self._obstacle_sweep_exact(idx, x, y, z, new_x, new_y, new_z)
+        # Drones clear of every obstacle by more than a move need no exact test
+        near = np.flatnonzero(self.obstacle_field.distances(np.column_stack((x, y, z))) <= self.field_margin)
+        blocked = np.zeros(len(idx), dtype=bool)
+        if near.size:
+            blocked[near] = self._obstacle_sweep_exact(idx[near], x[near], y[near], z[near],
+                                                       new_x[near], new_y[near], new_z[near])
+        return blocked
+
+    def _obstacle_sweep_exact(self, idx, x, y, z, new_x, new_y, new_z):
+        blocked = np.zeros(len(idx), dtype=bool)
+        for j, box in enumerate(self.obstacle_boxes):
+            # World to box frame, as OrientedBox.to_local
+            dx = x - box.center_x
+            dz = z - box.center_z
+            x0 = box.cos * dx - box.sin * dz
+            y0 = y - box.center_y
+            z0 = box.sin * dx + box.cos * dz
+            dx = new_x - box.center_x
+            dz = new_z - box.center_z
+            x1 = box.cos * dx - box.sin * dz
+            y1 = new_y - box.center_y
+            z1 = box.sin * dx + box.cos * dz
+
+            start_inside = (np.abs(x0) <= box.half_x) & (np.abs(y0) <= box.half_y) & (np.abs(z0) <= box.half_z)
+            end_inside = (np.abs(x1) <= box.half_x) & (np.abs(y1) <= box.half_y) & (np.abs(z1) <= box.half_z)
+            x_in, x_out = self._slab(x0, x1, box.half_x)
+            y_in, y_out = self._slab(y0, y1, box.half_y)
+            z_in, z_out = self._slab(z0, z1, box.half_z)
+            t_enter = np.maximum(np.maximum(np.maximum(x_in, y_in), z_in), 0.0)
+            t_exit = np.minimum(np.minimum(np.minimum(x_out, y_out), z_out), 1.0)
+            hit = np.where(start_inside, end_inside, t_enter <= t_exit)
+            blocked |= self.obstacle_visible[idx, j] & hit
+        return blocked
+
+    @staticmethod
+    def _sphere_sweep(x0, y0, z0, x1, y1, z1, cx, cy, cz, radius_sq):
+        """Vectorized sweep.segment_enters_sphere, with the radius squared"""
+        ex = x1 - cx
+        ey = y1 - cy
+        ez = z1 - cz
+        end_inside = ex * ex + ey * ey + ez * ez <= radius_sq
+        fx = x0 - cx
+        fy = y0 - cy
+        fz = z0 - cz
+        start_inside = fx * fx + fy * fy + fz * fz <= radius_sq
+        dx = x1 - x0
+        dy = y1 - y0
+        dz = z1 - z0
+        length_sq = dx * dx + dy * dy + dz * dz
+        with np.errstate(divide='ignore', invalid='ignore'):
+            t = -(fx * dx + fy * dy + fz * dz) / length_sq
+        px = fx + t * dx
+        py = fy + t * dy
+        pz = fz + t * dz
+        passes = (length_sq != 0.0) & (t > 0.0) & (t < 1.0) & (px * px + py * py + pz * pz <= radius_sq)
+        return end_inside | (~start_inside & passes)
+
+    def _move_planar(self, d, idx, sign):
+        other = 1 - d
+        angle = np.radians(self.drone_yaw[idx, d])
+        sin = np.sin(angle)
+        cos = np.cos(angle)
+        pos = self.drone_pos[idx, d]
+        x, y, z = pos[:, 0], pos[:, 1], pos[:, 2]
+        if sign > 0:
+            new_x = x + sin * self.speed
+            new_z = z + cos * self.speed
+        else:
+            new_x = x - sin * self.speed
+            new_z = z - cos * self.speed
+
+        ok = ((-self.half_width < new_x) & (new_x < self.half_width) &
+              (-self.half_depth < new_z) & (new_z < self.half_depth) &
+              ~self._obstacle_sweep(idx, x, y, z, new_x, y, new_z))
+
+        # Carrying a flag across the divider wall ends the game
+        crossing = (self.carried_flag[idx, d] >= 0) & (
+            ((x < self.wall_x) & (new_x > self.wall_x)) |
+            ((x > self.wall_x) & (new_x < self.wall_x)))
+        scored = ok & crossing
+        ok &= ~crossing
+
+        # Bumping the other drone blocks the move and returns its flag
+        other_pos = self.drone_pos[idx, other]
+        bumped = ok & self._sphere_sweep(x, y, z, new_x, y, new_z, other_pos[:, 0], other_pos[:, 1],
+                                         other_pos[:, 2], self.collision_radius_sq)
+        if bumped.any():
+            self._drop_flag(idx[bumped], other)
+        ok &= ~bumped
+
+        moved = idx[ok]
+        old_x = x[ok]
+        old_z = z[ok]
+        self.drone_pos[moved, d, 0] = new_x[ok]
+        self.drone_pos[moved, d, 2] = new_z[ok]
+
+        # Check for flag capture along the path of the drone's nose
+        free = self.carried_flag[moved, d] < 0
+        if free.any():
+            cand = moved[free]
+            flag = self.target_flag[d]
+            nose_dx = sin[ok][free] * self.nose_length
+            nose_dz = cos[ok][free] * self.nose_length
+            nose_y = self.drone_pos[cand, d, 1]
+            captured = self._sphere_sweep(
+                old_x[free] + nose_dx, nose_y, old_z[free] + nose_dz,
+                self.drone_pos[cand, d, 0] + nose_dx, nose_y, self.drone_pos[cand, d, 2] + nose_dz,
+                self.flag_pos[cand, flag, 0], self.flag_pos[cand, flag, 1], self.flag_pos[cand, flag, 2],
+                self.capture_radius_sq)
+            self.carried_flag[cand[captured], d] = flag
+
+        self._update_carried_flag(d, moved)
+
+        self.done[idx[scored]] = True
+
+    def _move_vertical(self, d, idx, delta):
+        x = self.drone_pos[idx, d, 0]
+        y = self.drone_pos[idx, d, 1]
+        z = self.drone_pos[idx, d, 2]
+        new_y = y + delta
+        ok = ((-self.half_height < new_y) & (new_y < self.half_height) &
+              ~self._obstacle_sweep(idx, x, y, z, x, new_y, z))
+        moved = idx[ok]
+        self.drone_pos[moved, d, 1] = new_y[ok]
+        self._update_carried_flag(d, moved)
+
+    def _rotate(self, d, idx, delta):
+        yaw = self.drone_yaw[idx, d] + delta
+        if delta > 0:
+            yaw[yaw >= 360] -= 360
+        else:
+            yaw[yaw < 0] += 360
+        self.drone_yaw[idx, d] = yaw
+        self._update_carried_flag(d, idx)
+
+    def _drop_flag(self, idx, d):
+        flags = self.carried_flag[idx, d]
+        carrying = flags >= 0
+        idx = idx[carrying]
+        flags = flags[carrying]
+        self.flag_pos[idx, flags] = self.flag_home[flags]
+        self.carried_flag[idx, d] = -1
+
+    def _update_carried_flag(self, d, idx):
+        flags = self.carried_flag[idx, d]
+        carrying = flags >= 0
+        if not carrying.any():
+            return
+        idx = idx[carrying]
+        flags = flags[carrying]
+
+        # Keep the flag in front of the drone's nose
+        angle = np.radians(self.drone_yaw[idx, d])
+        pos = self.drone_pos[idx, d]
+        flag_x = pos[:, 0] + np.sin(angle) * self.flag_carry_offset
+        flag_y = pos[:, 1]
+        flag_z = pos[:, 2] + np.cos(angle) * self.flag_carry_offset
+        self.flag_pos[idx, flags, 0] = flag_x
+        self.flag_pos[idx, flags, 1] = flag_y
+        self.flag_pos[idx, flags, 2] = flag_z
+
+        # If the flag touches the other drone it goes home
+        other_pos = self.drone_pos[idx, 1 - d]
+        dx = flag_x - other_pos[:, 0]
+        dy = flag_y - other_pos[:, 1]
+        dz = flag_z - other_pos[:, 2]
+        lost = dx * dx + dy * dy + dz * dz <= self.collision_radius_sq
+        if lost.any():
+            self._drop_flag(idx[lost], d)
+
+    def copy_to_arena(self, index, arena):
+        """Write the state of one batched arena into an Arena (e.g. to draw it)"""
+        for d, drone in enumerate(arena.drones):
+            drone.position = self.drone_pos[index, d].tolist()
+            drone.rotation[1] = float(self.drone_yaw[index, d])
+            flag = self.carried_flag[index, d]
+            drone.captured_flag = arena.flags[flag] if flag >= 0 else None
+        for f, flag in enumerate(arena.flags):
+            flag.position = self.flag_pos[index, f].tolist()
+            flag.carrier = None
+        for drone in arena.drones:
+            if drone.captured_flag is not None:
+                drone.captured_flag.carrier = drone
+        for body, visible in zip(arena.obstacles, self.obstacle_visible[index]):
+            body.visible = bool(visible)
+        arena.rebuild_grids()
@@ -0,0 +1,122 @@
+import numpy as np
+
+from .arena import Arena
+
+# Observation layout for one drone, all float32
+OBS_OWN_POS = slice(0, 3)
+OBS_OWN_HEADING = slice(3, 5)  # sin(yaw), cos(yaw)
+OBS_OPPONENT_POS = slice(5, 8)
+OBS_OPPONENT_HEADING = slice(8, 10)
+OBS_OWN_FLAG_POS = slice(10, 13)
+OBS_ENEMY_FLAG_POS = slice(13, 16)
+OBS_OWN_CARRYING = 16
+OBS_OPPONENT_CARRYING = 17
+OBS_RECTANGLE_VISIBLE = 18
+OBS_OBSTACLE_DISTANCE = 19  # Distance to the nearest obstacle (shown or hidden), from the arena's distance field
+OBS_SIZE = 20
+
+class CaptureFlagEnv:
+    """Gym-style reset/step control surface over an Arena.
+
+    Every drone acts every step. Observations, rewards and the info dict are
+    preallocated and refilled in place on every call, so callers that want to
+    keep a step's data must copy it. obs and reward may be passed in to have
+    the env write into existing arrays (e.g. shared memory views). In team
+    matches the opponent fields describe the first drone of the other team,
+    and a score rewards the whole scoring team. The step that scores
+    (terminated) observes the scoring state; reset() then starts the next
+    episode, as in Gym. With a ray_sensor (a RaySensor over the same
+    arena), info also carries its 'ray_distances', 'ray_classes' and
+    'ray_divider_distances', cast after every reset and step.
+    """
+
+    def __init__(self, arena=None, max_episode_steps=3000, score_reward=1.0,
+                 obs=None, reward=None, ray_sensor=None):
+        # Any Arena works here, including a drawable Environment
+        self.arena = arena if arena is not None else Arena.create_default()
+        self.max_episode_steps = max_episode_steps
+        self.score_reward = score_reward
+        self.num_agents = len(self.arena.drones)
+
+        if obs is None:
+            obs = np.zeros((self.num_agents, OBS_SIZE), dtype=np.float32)
+        if reward is None:
+            reward = np.zeros(self.num_agents, dtype=np.float32)
+        self.obs = obs
+        self.reward = reward
+        self.info = {'episode_step': 0, 'scorer': -1}
+        self.ray_sensor = ray_sensor
+        if ray_sensor is not None:
+            self.info['ray_distances'] = ray_sensor.distances
+            self.info['ray_classes'] = ray_sensor.classes
+            self.info['ray_divider_distances'] = ray_sensor.divider_distances
+        self.episode_step = 0
+        self.np_random = np.random.default_rng()
+
+        # Flags are indexed by team; each drone's own flag is its team's
+        drones = self.arena.drones
+        flags = self.arena.flags
+        teams = self.arena.teams
+        self._own_flag = [flags[drone.team] for drone in drones]
+        self._enemy_flag = [flags[1 - drone.team] for drone in drones]
+        self._opponent = [teams[1 - drone.team][0] for drone in drones]
+        self._team_mask = np.array([[drone.team == team for drone in drones] for team in range(len(teams))])
+        self.arena.distance_field  # Build it now rather than in the first observe()
+
+    def reset(self, seed=None):
+        """Start a new episode; returns (obs, info)"""
+        if seed is not None:
+            # The arena itself is deterministic; the generator is for callers' use
+            self.np_random = np.random.default_rng(seed)
+        self.arena.reset_game()
+        self.episode_step = 0
+        self.info['episode_step'] = 0
+        self.info['scorer'] = -1
+        self.observe()
+        return self.obs, self.info
+
+    def step(self, actions):
+        """Apply one action bitmask per drone; returns (obs, reward, terminated, truncated, info)"""
+        arena = self.arena
+        arena.last_scorer = None
+        terminated = arena.step(actions)
+        self.episode_step += 1
+        truncated = not terminated and self.episode_step >= self.max_episode_steps
+
+        self.reward.fill(0.0)
+        scorer = -1
+        if terminated and arena.last_scorer is not None:
+            scorer = arena.drones.index(arena.last_scorer)
+            self.reward.fill(-self.score_reward)
+            self.reward[self._team_mask[arena.last_scorer.team]] = self.score_reward
+
+        self.info['episode_step'] = self.episode_step
+        self.info['scorer'] = scorer
+        self.observe()
+        return self.obs, self.reward, terminated, truncated, self.info
+
+    def observe(self):
+        """Refill obs from the arena's current state, without stepping; returns obs"""
+        arena = self.arena
+        drones = arena.drones
+        rectangle_visible = 1.0 if arena.rectangle.visible else 0.0
+        obstacle_distances = arena.distance_field.distances(arena.registry.positions[arena.drone_rows])
+        for i, drone in enumerate(drones):
+            obs = self.obs[i]
+            opponent = self._opponent[i]
+            self._write_pose(obs, OBS_OWN_POS, OBS_OWN_HEADING, drone)
+            self._write_pose(obs, OBS_OPPONENT_POS, OBS_OPPONENT_HEADING, opponent)
+            obs[OBS_OWN_FLAG_POS] = self._own_flag[i].position
+            obs[OBS_ENEMY_FLAG_POS] = self._enemy_flag[i].position
+            obs[OBS_OWN_CARRYING] = drone.captured_flag is not None
+            obs[OBS_OPPONENT_CARRYING] = opponent.captured_flag is not None
+            obs[OBS_RECTANGLE_VISIBLE] = rectangle_visible
+            obs[OBS_OBSTACLE_DISTANCE] = obstacle_distances[i]
+        if self.ray_sensor is not None:
+            self.ray_sensor.cast()
+        return self.obs
+
+    @staticmethod
+    def _write_pose(obs, pos_slice, heading_slice, drone):
+        obs[pos_slice] = drone.position
+        obs[heading_slice] = drone.heading()
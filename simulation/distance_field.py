@@ -0,0 +1,151 @@
+import hashlib
+import math
+import os
+
+import numpy as np
+
+from .obstacles import OrientedBox
+
+# A place to pass as cache_dir; nothing is written to disk unless asked
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'glenv', 'distance_fields')
+VERSION = 1  # Bump when the field's contents change, so stale cache files are ignored
+
+class DistanceField:
+    """Signed distance to the arena's obstacles, sampled on a grid over the arena.
+
+    Covers every obstacle box, hidden or not, at its bare size (no drone
+    buffer); distances are negative inside one. The container walls are
+    planes whose distance is a single min(), and the divider wall and the
+    bases stop nobody but flag carriers, so none of them is in the field.
+    With no obstacle in range a value is the length of the arena diagonal.
+
+    Lookups interpolate trilinearly between grid points, which is within
+    error_bound of the true distance. Fields are cached in memory, keyed by
+    a hash of the scene, and also on disk when given a cache_dir, so
+    building one for a known scene is a file read (or nothing).
+    """
+    _loaded = {}  # Scene key -> field, shared by every arena with that scene
+
+    def __init__(self, values, origin, cell_size):
+        self.values = values  # (nx, ny, nz) float32, values[i, j, k] at origin + (i, j, k) * cell_size
+        self.origin = tuple(float(v) for v in origin)
+        self.cell_size = float(cell_size)
+        self.error_bound = self.cell_size * math.sqrt(3) + 1e-4  # Covers float32 rounding too
+        self._inv_cell = 1.0 / self.cell_size
+        self._shape = values.shape
+        self._flat = values.ravel().tolist()  # Python floats, for fast scalar lookups
+
+    @classmethod
+    def for_arena(cls, arena, cell_size=0.5, cache_dir=None):
+        """The field of an arena's current scene, cached in cache_dir if one is given"""
+        boxes = [OrientedBox(body) for body in arena.obstacles]
+        size = (float(arena.width), float(arena.height), float(arena.depth))
+        key = scene_key(size, boxes, cell_size)
+        field = cls._loaded.get(key)
+        if field is not None:
+            return field
+
+        path = os.path.join(cache_dir, f'{key}.npz') if cache_dir is not None else None
+        field = cls.load(path) if path is not None and os.path.exists(path) else None
+        if field is None:
+            field = cls.build(size, boxes, cell_size)
+            if path is not None:
+                field.save(path)
+        cls._loaded[key] = field
+        return field
+
+    @classmethod
+    def build(cls, size, boxes, cell_size):
+        """Sample the field of the given OrientedBoxes over an arena of size (width, height, depth)"""
+        half = np.array(size) / 2
+        counts = np.ceil(2 * half / cell_size).astype(int) + 1
+        origin = -half
+        x, y, z = np.meshgrid(*(origin[a] + np.arange(counts[a]) * cell_size for a in range(3)), indexing='ij')
+
+        distance = np.full(x.shape, np.linalg.norm(size))
+        for box in boxes:
+            # Exact box distance in the box's frame
+            dx = x - box.center_x
+            dz = z - box.center_z
+            qx = np.abs(box.cos * dx - box.sin * dz) - box.half_x
+            qy = np.abs(y - box.center_y) - box.half_y
+            qz = np.abs(box.sin * dx + box.cos * dz) - box.half_z
+            outside = np.sqrt(np.maximum(qx, 0.0) ** 2 + np.maximum(qy, 0.0) ** 2 + np.maximum(qz, 0.0) ** 2)
+            inside = np.minimum(np.maximum(np.maximum(qx, qy), qz), 0.0)
+            np.minimum(distance, outside + inside, out=distance)
+        return cls(distance.astype(np.float32), origin, cell_size)
+
+    @classmethod
+    def load(cls, path):
+        """Read a saved field; None if the file is unreadable"""
+        try:
+            with np.load(path) as data:
+                return cls(data['values'], data['origin'], float(data['cell_size']))
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def save(self, path):
+        """Write the field, quietly giving up if the cache directory is not writable"""
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write under a temporary name first so readers never see half a file
+            temp_path = f'{path}.{os.getpid()}.tmp'
+            with open(temp_path, 'wb') as f:
+                np.savez(f, values=self.values, origin=self.origin, cell_size=self.cell_size)
+            os.replace(temp_path, path)
+        except OSError:
+            pass
+
+    def distance(self, x, y, z):
+        """Interpolated distance at one point; points off the grid use its nearest edge"""
+        nx, ny, nz = self._shape
+        inv_cell = self._inv_cell
+        fx = min(max((x - self.origin[0]) * inv_cell, 0.0), nx - 1.0)
+        fy = min(max((y - self.origin[1]) * inv_cell, 0.0), ny - 1.0)
+        fz = min(max((z - self.origin[2]) * inv_cell, 0.0), nz - 1.0)
+        i = min(int(fx), nx - 2)
+        j = min(int(fy), ny - 2)
+        k = min(int(fz), nz - 2)
+        tx = fx - i
+        ty = fy - j
+        tz = fz - k
+
+        v = self._flat
+        stride_x = ny * nz
+        base = (i * ny + j) * nz + k
+        c00 = v[base] + (v[base + 1] - v[base]) * tz
+        c01 = v[base + nz] + (v[base + nz + 1] - v[base + nz]) * tz
+        base += stride_x
+        c10 = v[base] + (v[base + 1] - v[base]) * tz
+        c11 = v[base + nz] + (v[base + nz + 1] - v[base + nz]) * tz
+        c0 = c00 + (c01 - c00) * ty
+        c1 = c10 + (c11 - c10) * ty
+        return c0 + (c1 - c0) * tx
+
+    def distances(self, points):
+        """Interpolated distances at an (n, 3) array of points, as one gather"""
+        points = np.asarray(points, dtype=float)
+        shape = np.array(self._shape)
+        f = np.clip((points - self.origin) * self._inv_cell, 0.0, shape - 1.0)
+        cell = np.minimum(f.astype(int), shape - 2)
+        t = f - cell
+        i, j, k = cell[:, 0], cell[:, 1], cell[:, 2]
+        tx, ty, tz = t[:, 0], t[:, 1], t[:, 2]
+
+        v = self.values
+        c00 = v[i, j, k] + (v[i, j, k + 1] - v[i, j, k]) * tz
+        c01 = v[i, j + 1, k] + (v[i, j + 1, k + 1] - v[i, j + 1, k]) * tz
+        c10 = v[i + 1, j, k] + (v[i + 1, j, k + 1] - v[i + 1, j, k]) * tz
+        c11 = v[i + 1, j + 1, k] + (v[i + 1, j + 1, k + 1] - v[i + 1, j + 1, k]) * tz
+        c0 = c00 + (c01 - c00) * ty
+        c1 = c10 + (c11 - c10) * ty
+        return c0 + (c1 - c0) * tx
+
+def scene_key(size, boxes, cell_size):
+    """Hash of everything a field depends on, for naming cache files"""
+    digest = hashlib.sha1()
+    digest.update(repr((VERSION, size, float(cell_size))).encode())
+    for box in boxes:
+        digest.update(repr((box.center_x, box.center_y, box.center_z, box.cos, box.sin,
+                            box.half_x, box.half_y, box.half_z)).encode())
+    return digest.hexdigest()
@@ -0,0 +1,12 @@
+from .entity import Entity
+
+class DividerWallBody(Entity):
+    __slots__ = ('height', 'depth', 'thickness', 'color')
+    
+    def __init__(self, height=10.0, depth=18.0, thickness=0.005):
+        super().__init__()
+        self.height = height
+        self.depth = depth
+        self.thickness = thickness
+        self.color = (0.0, 0.7, 1.0, 0.03)  # Light blue with very high transparency
+        self.position = [0, -5, 0]  # Move wall down to floor level
@@ -0,0 +1,262 @@
+from .entity import Entity
+from .teams import BLUE, team_of_color
+from .sweep import segment_enters_sphere
+import math
+
+class DroneBody(Entity):
+    # Rule constants, shared with the batched engine
+    obstacle_buffer = 0.5  # Small buffer around obstacles to prevent clipping
+    collision_radius = 2.0  # Increased from 1.0 to 2.0 for better detection
+    capture_radius = 3.0  # Increased from 1.0 to make capture easier
+    flag_carry_offset = 1.0  # Distance in front of drone a carried flag sits
+    speed_per_second = 18.0  # 0.3 per tick at the default 60 Hz
+    rotation_speed_per_second = 180.0  # 3 degrees per tick at 60 Hz
+
+    __slots__ = ('color', 'size', 'speed', 'rotation_speed', 'environment', 'captured_flag', 'team')
+
+    def __init__(self, color=(1.0, 0.0, 0.0), size=1.0, team=None):  # Default red color
+        super().__init__()
+        self.color = color
+        self.size = 0.75  # Fixed size for consistent collision
+        self.speed = 0.3  # Slower speed for more precise movement
+        self.rotation_speed = 3.0  # Degrees per frame
+        self.environment = None  # Will be set by the Arena
+        self.captured_flag = None  # Reference to the captured flag
+        self.team = team_of_color(color) if team is None else team  # Arena.set_teams overrides this
+        
+    @property
+    def is_blue(self):
+        return self.team == BLUE
+        
+    def set_tick_rate(self, tick_rate):
+        """Scale the per-tick speeds so a drone covers the same ground per second at any rate"""
+        self.speed = self.speed_per_second / tick_rate
+        self.rotation_speed = self.rotation_speed_per_second / tick_rate
+        
+    def check_obstacle_collision(self, x, y, z):
+        """Whether (x, y, z) is inside a static obstacle, buffer included"""
+        if not self.environment:
+            return False
+        return self.environment.obstacle_tree.contains(x, y, z)
+        
+    def check_obstacle_sweep(self, new_x, new_y, new_z):
+        """Whether the move from the current position to (new_x, new_y, new_z) enters a static obstacle"""
+        if not self.environment:
+            return False
+        position = self.position
+        return self.environment.obstacle_tree.segment_blocked(position[0], position[1], position[2],
+                                                              new_x, new_y, new_z)
+            
+    def check_divider_wall_collision(self, new_x):
+        if not self.environment or not self.captured_flag:
+            return False
+            
+        # Get wall position and dimensions
+        wall = self.environment.divider_wall
+        wall_x = wall.position[0]
+        wall_thickness = wall.thickness
+        
+        # Add a small buffer around the wall
+        buffer = 0.2
+        
+        # Check if drone would cross the wall
+        current_x = self.position[0]
+        if (current_x < wall_x and new_x > wall_x) or (current_x > wall_x and new_x < wall_x):
+            # If crossing and carrying flag, score and trigger reset
+            self.environment.flag_scored(self)
+            return True
+            
+        return False
+        
+    def check_drone_collision(self, new_x, new_y, new_z):
+        if not self.environment:
+            return False
+            
+        # Look up drones within collision radius of the path from here to the new position
+        position = self.position
+        x, y, z = position[0], position[1], position[2]
+        half_step = math.sqrt((new_x - x) ** 2 + (new_y - y) ** 2 + (new_z - z) ** 2) / 2
+        nearby = self.environment.drone_grid.query((x + new_x) / 2, (y + new_y) / 2, (z + new_z) / 2,
+                                                   self.collision_radius + half_step)
+        collided = False
+        for other_drone in nearby:
+            if other_drone is self:
+                continue
+            other = other_drone.position
+            if not segment_enters_sphere(x, y, z, new_x, new_y, new_z,
+                                         other[0], other[1], other[2], self.collision_radius):
+                continue
+            collided = True
+            # If an opposing drone has a flag, return it to base
+            if other_drone.captured_flag and other_drone.team != self.team:
+                # Reset flag to its home position
+                self.environment.return_flag(other_drone)
+                
+        return collided
+                
+    def check_flag_collision(self, flag, old_x=None, old_z=None):
+        """Whether the nose reaches the flag; with old_x/old_z, anywhere on the way from there"""
+        # Don't check if we already have a flag, it's our own team's flag or someone carries it
+        if self.captured_flag or flag.team == self.team or flag.carrier is not None:
+            return False
+            
+        # Sweep the drone's nose against the capture radius around the flag
+        position = self.position
+        sin_yaw, cos_yaw = self.heading()
+        nose_dx = sin_yaw * self.size
+        nose_dz = cos_yaw * self.size
+        nose_x = position[0] + nose_dx
+        nose_z = position[2] + nose_dz
+        if old_x is None:
+            old_nose_x, old_nose_z = nose_x, nose_z
+        else:
+            old_nose_x, old_nose_z = old_x + nose_dx, old_z + nose_dz
+        flag_pos = flag.position
+        return segment_enters_sphere(old_nose_x, position[1], old_nose_z, nose_x, position[1], nose_z,
+                                     flag_pos[0], flag_pos[1], flag_pos[2], self.capture_radius)
+        
+    def update_captured_flag_position(self):
+        if self.captured_flag:
+            position = self.position
+            # Update flag position relative to drone's nose
+            sin_yaw, cos_yaw = self.heading()
+            offset = self.flag_carry_offset
+            
+            # Calculate position in front of drone
+            self.captured_flag.position[0] = position[0] + sin_yaw * offset
+            self.captured_flag.position[1] = position[1]  # Same height as drone
+            self.captured_flag.position[2] = position[2] + cos_yaw * offset
+            
+            self.environment.flag_grid.update(self.captured_flag)
+            
+            # If flag collides with an opposing drone, reset it
+            flag_pos = self.captured_flag.position
+            nearby = self.environment.drone_grid.query(flag_pos[0], flag_pos[1], flag_pos[2], self.collision_radius)
+            for other_drone in nearby:
+                if other_drone.team != self.team:
+                    self.environment.return_flag(self)
+                    break
+                
+    def find_capturable_flag(self, old_x, old_z):
+        """First flag this drone may take that its nose passed within capture radius of,
+        moving from (old_x, old_z) to where it is now"""
+        position = self.position
+        sin_yaw, cos_yaw = self.heading()
+        nose_x = position[0] + sin_yaw * self.size
+        nose_z = position[2] + cos_yaw * self.size
+        half_step = math.sqrt((position[0] - old_x) ** 2 + (position[2] - old_z) ** 2) / 2
+        nearby = self.environment.flag_grid.query(nose_x + (old_x - position[0]) / 2, position[1],
+                                                  nose_z + (old_z - position[2]) / 2,
+                                                  self.capture_radius + half_step)
+        for flag in nearby:
+            if flag.carrier is None and self.check_flag_collision(flag, old_x, old_z):
+                return flag
+        return None
+        
+    def move_forward(self):
+        position = self.position  # View into the arena's pose registry; fetch it once
+        # Calculate new position
+        sin_yaw, cos_yaw = self.heading()
+        new_x = position[0] + sin_yaw * self.speed
+        new_z = position[2] + cos_yaw * self.speed
+        
+        # Check if new position would be within bounds and not colliding with an obstacle
+        if self.environment:
+            half_width = self.environment.width / 2
+            half_depth = self.environment.depth / 2
+            
+            # Only update if within bounds and not colliding
+            if (-half_width < new_x < half_width and 
+                -half_depth < new_z < half_depth and
+                not self.check_obstacle_sweep(new_x, position[1], new_z)):
+                # Check for divider wall and drone collisions first
+                if not self.check_divider_wall_collision(new_x) and \
+                   not self.check_drone_collision(new_x, position[1], new_z):
+                    old_x, old_z = position[0], position[2]
+                    position[0] = new_x
+                    position[2] = new_z
+                    self.environment.drone_grid.update(self)
+                    
+                    # Check for flag collision along the move
+                    if not self.captured_flag:
+                        self.captured_flag = self.find_capturable_flag(old_x, old_z)
+                        if self.captured_flag:
+                            self.captured_flag.carrier = self
+                                
+                    # Update captured flag position
+                    self.update_captured_flag_position()
+        
+    def move_backward(self):
+        position = self.position
+        # Calculate new position
+        sin_yaw, cos_yaw = self.heading()
+        new_x = position[0] - sin_yaw * self.speed
+        new_z = position[2] - cos_yaw * self.speed
+        
+        # Check if new position would be within bounds and not colliding with an obstacle
+        if self.environment:
+            half_width = self.environment.width / 2
+            half_depth = self.environment.depth / 2
+            
+            # Only update if within bounds and not colliding
+            if (-half_width < new_x < half_width and 
+                -half_depth < new_z < half_depth and
+                not self.check_obstacle_sweep(new_x, position[1], new_z)):
+                # Check for divider wall and drone collisions first
+                if not self.check_divider_wall_collision(new_x) and \
+                   not self.check_drone_collision(new_x, position[1], new_z):
+                    old_x, old_z = position[0], position[2]
+                    position[0] = new_x
+                    position[2] = new_z
+                    self.environment.drone_grid.update(self)
+                    
+                    # Check for flag collision along the move
+                    if not self.captured_flag:
+                        self.captured_flag = self.find_capturable_flag(old_x, old_z)
+                        if self.captured_flag:
+                            self.captured_flag.carrier = self
+                                
+                    # Update captured flag position
+                    self.update_captured_flag_position()
+
+    def move_upward(self):
+        position = self.position
+        # calculate new position
+        new_y = position[1] + self.speed
+        
+        if self.environment:
+            half_height = self.environment.height / 2
+            
+            # Only update if within bounds and not colliding
+            if (-half_height < new_y < half_height and 
+                not self.check_obstacle_sweep(position[0], new_y, position[2])):
+                position[1] = new_y
+                self.update_captured_flag_position()
+
+    def move_downward(self):
+        position = self.position
+        # calculate new position
+        new_y = position[1] - self.speed
+        
+        if self.environment:
+            half_height = self.environment.height / 2
+            
+            # Only update if within bounds and not colliding
+            if (-half_height < new_y < half_height and 
+                not self.check_obstacle_sweep(position[0], new_y, position[2])):
+                position[1] = new_y
+                self.update_captured_flag_position()
+   
+    def rotate_left(self):
+        # Rotate counterclockwise around Y axis
+        self.rotation[1] += self.rotation_speed
+        if self.rotation[1] >= 360:
+            self.rotation[1] -= 360
+        self.update_captured_flag_position()
+        
+    def rotate_right(self):
+        # Rotate clockwise around Y axis
+        self.rotation[1] -= self.rotation_speed
+        if self.rotation[1] < 0:
+            self.rotation[1] += 360
+        self.update_captured_flag_position()
@@ -0,0 +1,80 @@
+import math
+
+import numpy as np
+
+class Entity:
+    """Position, rotation and scale, stored as rows of float64 arrays.
+
+    An entity starts with storage of its own; an EntityRegistry can take it
+    over, after which the three attributes are views of the registry's rows.
+    They are memoryviews rather than NumPy rows so that indexing them yields
+    plain Python floats, which keeps per-object rule code fast. Assigning to
+    them copies the three values in rather than rebinding.
+    """
+    __slots__ = ('_position', '_rotation', '_scale', 'registry', 'index', '_heading_yaw', '_heading')
+
+    def __init__(self, position=(0, 0, 0), rotation=(0, 0, 0), scale=(1, 1, 1)):
+        self._position = memoryview(np.array(position, dtype=float))
+        self._rotation = memoryview(np.array(rotation, dtype=float))
+        self._scale = memoryview(np.array(scale, dtype=float))
+        self.registry = None
+        self.index = -1
+        self._heading_yaw = None  # Yaw the cached heading was worked out for
+        self._heading = (0.0, 1.0)
+        
+    def bind(self, registry, index):
+        """Point this entity at row index of registry (see EntityRegistry.add)"""
+        self.registry = registry
+        self.index = index
+        self._position = memoryview(registry.positions[index])
+        self._rotation = memoryview(registry.rotations[index])
+        self._scale = memoryview(registry.scales[index])
+        
+    @property
+    def position(self):
+        return self._position
+    
+    @position.setter
+    def position(self, value):
+        view = self._position
+        view[0], view[1], view[2] = value
+        
+    @property
+    def rotation(self):
+        return self._rotation
+    
+    @rotation.setter
+    def rotation(self, value):
+        view = self._rotation
+        view[0], view[1], view[2] = value
+        
+    @property
+    def scale(self):
+        return self._scale
+    
+    @scale.setter
+    def scale(self, value):
+        view = self._scale
+        view[0], view[1], view[2] = value
+        
+    def heading(self):
+        """(sin, cos) of the yaw, rotation[1]: the XZ forward vector.
+        
+        Cached against the yaw it was computed for, so it stays right however
+        the rotation was written (views, registry restores, replays) and the
+        trig only runs when the yaw actually changed.
+        """
+        yaw = self._rotation[1]
+        if yaw != self._heading_yaw:
+            angle_rad = math.radians(yaw)
+            self._heading = (math.sin(angle_rad), math.cos(angle_rad))
+            self._heading_yaw = yaw
+        return self._heading
+        
+    def update(self, delta_time):
+        """Update the entity's state"""
+        pass
+        
+    def draw(self):
+        """Draw the entity (no-op without a renderer)"""
+        pass
@@ -0,0 +1,105 @@
+import ctypes
+
+import numpy as np
+
+class EntityRegistry:
+    """Pose storage shared by a group of entities.
+
+    Row i of positions, rotations and scales belongs to entities[i]. Once
+    added, an entity's position, rotation and scale are views of its rows, so
+    per-object code reads and writes these arrays directly while batch code
+    (rendering, observations, resets) can work on whole slices at once.
+
+    matrices holds every entity's model matrix for drawing; see
+    update_matrices().
+    """
+
+    def __init__(self, entities=()):
+        self.entities = []
+        self.positions = np.zeros((0, 3))
+        self.rotations = np.zeros((0, 3))
+        self.scales = np.zeros((0, 3))
+        self.matrices = np.zeros((0, 4, 4), dtype=np.float32)
+        self.matrix_pointers = []  # float * to each matrix, for C APIs
+        self._matrix_poses = np.zeros((0, 9))  # Poses the matrices were built from
+        if entities:
+            self.add(entities)
+
+    def __len__(self):
+        return len(self.entities)
+
+    def add(self, entities):
+        """Move the entities' poses into the registry; returns the slice of rows they got"""
+        entities = list(entities)
+        start = len(self.entities)
+        self.entities += entities
+        self.positions = np.concatenate([self.positions, [e.position for e in entities]])
+        self.rotations = np.concatenate([self.rotations, [e.rotation for e in entities]])
+        self.scales = np.concatenate([self.scales, [e.scale for e in entities]])
+
+        # The arrays were reallocated, so every entity needs fresh views
+        for index, entity in enumerate(self.entities):
+            entity.bind(self, index)
+        return slice(start, len(self.entities))
+
+    def snapshot(self):
+        """Copy of every pose, for restore()"""
+        return self.positions.copy(), self.rotations.copy(), self.scales.copy()
+
+    def restore(self, snapshot):
+        positions, rotations, scales = snapshot
+        self.positions[:] = positions
+        self.rotations[:] = rotations
+        self.scales[:] = scales
+
+    def update_matrices(self):
+        """Rebuild the model matrices of the entities whose pose changed since the last call.
+
+        Poses are compared rather than flagged dirty, since rule code writes
+        them straight through views. Returns matrices.
+        """
+        poses = np.concatenate([self.positions, self.rotations, self.scales], axis=1)
+        if len(poses) != len(self._matrix_poses):
+            self.matrices = model_matrices(poses)
+            address = self.matrices.ctypes.data
+            pointer_type = ctypes.POINTER(ctypes.c_float)
+            self.matrix_pointers = [ctypes.cast(address + i * self.matrices.strides[0], pointer_type)
+                                    for i in range(len(poses))]
+        else:
+            changed = np.flatnonzero((poses != self._matrix_poses).any(axis=1))
+            if changed.size:
+                self.matrices[changed] = model_matrices(poses[changed])
+        self._matrix_poses = poses
+        return self.matrices
+
+def model_matrices(poses):
+    """Model matrices for an (n, 9) array of position, rotation and scale rows.
+
+    Each is translate * rotate X, Y then Z (degrees) * scale, the same
+    transform as glTranslatef, three glRotatef calls and glScalef, stored
+    column-major in float32 as glMultMatrixf takes it.
+    """
+    angles = np.radians(poses[:, 3:6])
+    sin = np.sin(angles)
+    cos = np.cos(angles)
+    sx, sy, sz = sin[:, 0], sin[:, 1], sin[:, 2]
+    cx, cy, cz = cos[:, 0], cos[:, 1], cos[:, 2]
+
+    # Rows of Rx @ Ry @ Rz
+    rotation = np.empty((len(poses), 3, 3))
+    rotation[:, 0, 0] = cy * cz
+    rotation[:, 0, 1] = -cy * sz
+    rotation[:, 0, 2] = sy
+    rotation[:, 1, 0] = sx * sy * cz + cx * sz
+    rotation[:, 1, 1] = cx * cz - sx * sy * sz
+    rotation[:, 1, 2] = -sx * cy
+    rotation[:, 2, 0] = sx * sz - cx * sy * cz
+    rotation[:, 2, 1] = cx * sy * sz + sx * cz
+    rotation[:, 2, 2] = cx * cy
+
+    # Column-major: matrices[i, column, row]
+    matrices = np.zeros((len(poses), 4, 4), dtype=np.float32)
+    matrices[:, :3, :3] = rotation.transpose(0, 2, 1) * poses[:, 6:9, None]
+    matrices[:, 3, :3] = poses[:, 0:3]
+    matrices[:, 3, 3] = 1.0
+    return matrices
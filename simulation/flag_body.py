@@ -0,0 +1,20 @@
+from .entity import Entity
+from .teams import team_of_color
+
+class FlagBody(Entity):
+    __slots__ = ('color', 'size', 'team', 'home_position', 'carrier')
+    
+    def __init__(self, color=(1.0, 0.0, 0.0), size=0.5, team=None):  # Default red color
+        super().__init__()
+        self.color = color
+        self.size = size
+        self.team = team_of_color(color) if team is None else team
+        self.home_position = [0, 0, 0]  # Store original position
+        self.carrier = None  # Drone carrying the flag, if any
+        
+    def set_home_position(self, position):
+        self.home_position = list(position)
+        self.position = position
+        
+    def reset_position(self):
+        self.position = self.home_position
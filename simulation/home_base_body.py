@@ -0,0 +1,11 @@
+from .entity import Entity
+from .teams import team_of_color
+
+class HomeBaseBody(Entity):
+    __slots__ = ('color', 'size', 'team')
+    
+    def __init__(self, color=(1.0, 0.0, 0.0), size=2, team=None):  # Default red color
+        super().__init__()
+        self.color = color
+        self.size = size
+        self.team = team_of_color(color) if team is None else team
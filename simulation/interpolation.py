@@ -0,0 +1,49 @@
+import numpy as np
+
+class PoseInterpolator:
+    """Blends an Arena's poses between the last two simulation ticks for drawing.
+
+    Call capture() just before each tick. blend(alpha) then swaps poses
+    alpha of the way from the previous tick to the current one into the
+    entity registry; restore() puts the real state back. Yaw is blended
+    along the short way round, and a jump (Arena.jump_count) is never
+    blended across.
+    """
+
+    def __init__(self, arena):
+        self.arena = arena
+        self.previous_positions = None
+        self.previous_rotations = None
+        self._jump_count = None
+        self.capture()
+
+    def capture(self):
+        registry = self.arena.registry
+        if self.previous_positions is None or self.previous_positions.shape != registry.positions.shape:
+            # (Re)allocate; also covers set_teams() changing the registry
+            self.previous_positions = registry.positions.copy()
+            self.previous_rotations = registry.rotations.copy()
+            self._positions = np.empty_like(registry.positions)
+            self._rotations = np.empty_like(registry.rotations)
+        else:
+            self.previous_positions[:] = registry.positions
+            self.previous_rotations[:] = registry.rotations
+        self._jump_count = self.arena.jump_count
+
+    def blend(self, alpha):
+        """Write the interpolated poses into the registry until restore()"""
+        registry = self.arena.registry
+        self._positions[:] = registry.positions
+        self._rotations[:] = registry.rotations
+        if self.arena.jump_count != self._jump_count:
+            return  # Something teleported; draw the poses as they are
+
+        registry.positions *= alpha
+        registry.positions += (1.0 - alpha) * self.previous_positions
+        turn = (self._rotations - self.previous_rotations + 180.0) % 360.0 - 180.0
+        registry.rotations[:] = self.previous_rotations + alpha * turn
+
+    def restore(self):
+        registry = self.arena.registry
+        registry.positions[:] = self._positions
+        registry.rotations[:] = self._rotations
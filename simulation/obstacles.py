@@ -0,0 +1,134 @@
+import math
+
+from .sweep import segment_enters_box
+
+class OrientedBox:
+    """A static obstacle: a box turned about Y, grown by padding on every side.
+
+    Built from a body with position, rotation, scale and width, height and
+    depth (e.g. RectangleBody). Only the yaw, rotation[1], is used; it turns
+    the box the same way glRotatef and the drones' headings do. The
+    world-to-local rotation and the world-space bounds are worked out once
+    here, so build a new box if the body moves.
+    """
+    __slots__ = ('body', 'center_x', 'center_y', 'center_z', 'cos', 'sin',
+                 'half_x', 'half_y', 'half_z', 'bounds')
+
+    def __init__(self, body, padding=0.0):
+        self.body = body
+        position = body.position
+        scale = body.scale
+        self.center_x = float(position[0])
+        self.center_y = float(position[1])
+        self.center_z = float(position[2])
+        angle_rad = math.radians(body.rotation[1])
+        self.cos = math.cos(angle_rad)
+        self.sin = math.sin(angle_rad)
+        self.half_x = body.width * scale[0] / 2 + padding
+        self.half_y = body.height * scale[1] / 2 + padding
+        self.half_z = body.depth * scale[2] / 2 + padding
+
+        # Axis-aligned bounds of the turned box, rounded out a little so culling
+        # by them never drops a hit the exact test would find
+        extent_x = abs(self.cos) * self.half_x + abs(self.sin) * self.half_z + 1e-9
+        extent_y = self.half_y + 1e-9
+        extent_z = abs(self.sin) * self.half_x + abs(self.cos) * self.half_z + 1e-9
+        self.bounds = (self.center_x - extent_x, self.center_y - extent_y, self.center_z - extent_z,
+                       self.center_x + extent_x, self.center_y + extent_y, self.center_z + extent_z)
+
+    def to_local(self, x, y, z):
+        """World point in the box's frame, where the box is |x|, |y|, |z| <= its half sizes"""
+        dx = x - self.center_x
+        dz = z - self.center_z
+        return self.cos * dx - self.sin * dz, y - self.center_y, self.sin * dx + self.cos * dz
+
+    def contains(self, x, y, z):
+        local_x, local_y, local_z = self.to_local(x, y, z)
+        return abs(local_x) <= self.half_x and abs(local_y) <= self.half_y and abs(local_z) <= self.half_z
+
+    def segment_enters(self, x0, y0, z0, x1, y1, z1):
+        """Swept test of a move; see sweep.segment_enters_box"""
+        local_x0, local_y0, local_z0 = self.to_local(x0, y0, z0)
+        local_x1, local_y1, local_z1 = self.to_local(x1, y1, z1)
+        return segment_enters_box(local_x0, local_y0, local_z0, local_x1, local_y1, local_z1,
+                                  self.half_x, self.half_y, self.half_z)
+
+class ObstacleTree:
+    """Bounding volume hierarchy over OrientedBoxes.
+
+    Built top-down once per scene: a node's boxes are split at the median of
+    their centres along the node's longest axis, down to leaves of at most
+    leaf_size boxes. Queries only descend into nodes whose bounds overlap
+    the query's, so a drone step tests the few obstacles near it rather than
+    every one on the map. Boxes whose body is not visible are skipped.
+    """
+    leaf_size = 2
+
+    def __init__(self, boxes=()):
+        self.boxes = []  # Leaf order; every leaf owns a contiguous run
+        # Depth-first nodes: (min_x, min_y, min_z, max_x, max_y, max_z, first, count, right).
+        # Leaves have count > 0; an inner node's children are the next node and nodes[right].
+        self.nodes = []
+        boxes = list(boxes)
+        if boxes:
+            self._build(boxes)
+
+    def __len__(self):
+        return len(self.boxes)
+
+    def _build(self, boxes):
+        index = len(self.nodes)
+        self.nodes.append(None)
+        bounds = (min(b.bounds[0] for b in boxes), min(b.bounds[1] for b in boxes),
+                  min(b.bounds[2] for b in boxes), max(b.bounds[3] for b in boxes),
+                  max(b.bounds[4] for b in boxes), max(b.bounds[5] for b in boxes))
+        if len(boxes) <= self.leaf_size:
+            self.nodes[index] = bounds + (len(self.boxes), len(boxes), 0)
+            self.boxes += boxes
+            return
+
+        axis = max(range(3), key=lambda a: bounds[a + 3] - bounds[a])
+        boxes.sort(key=lambda b: b.bounds[axis] + b.bounds[axis + 3])
+        middle = len(boxes) // 2
+        self._build(boxes[:middle])
+        right = len(self.nodes)
+        self._build(boxes[middle:])
+        self.nodes[index] = bounds + (0, 0, right)
+
+    def query(self, min_x, min_y, min_z, max_x, max_y, max_z):
+        """Visible boxes whose bounds overlap the given bounds"""
+        found = []
+        nodes = self.nodes
+        stack = [0] if nodes else []
+        while stack:
+            index = stack.pop()
+            node = nodes[index]
+            if (node[0] > max_x or node[3] < min_x or node[1] > max_y or node[4] < min_y or
+                    node[2] > max_z or node[5] < min_z):
+                continue
+            count = node[7]
+            if not count:
+                stack.append(node[8])
+                stack.append(index + 1)
+                continue
+            for box in self.boxes[node[6]:node[6] + count]:
+                bounds = box.bounds
+                if (box.body.visible and bounds[0] <= max_x and bounds[3] >= min_x and
+                        bounds[1] <= max_y and bounds[4] >= min_y and
+                        bounds[2] <= max_z and bounds[5] >= min_z):
+                    found.append(box)
+        return found
+
+    def contains(self, x, y, z):
+        """Whether (x, y, z) is inside any visible box"""
+        for box in self.query(x, y, z, x, y, z):
+            if box.contains(x, y, z):
+                return True
+        return False
+
+    def segment_blocked(self, x0, y0, z0, x1, y1, z1):
+        """Whether a move from (x0, y0, z0) to (x1, y1, z1) enters any visible box"""
+        for box in self.query(min(x0, x1), min(y0, y1), min(z0, z1), max(x0, x1), max(y0, y1), max(z0, z1)):
+            if box.segment_enters(x0, y0, z0, x1, y1, z1):
+                return True
+        return False
@@ -0,0 +1,71 @@
+class Playback:
+    """Play a recorded match back into an Arena.
+
+    Every record of a replay file holds the full state of its tick, so each
+    one is a keyframe and the reader's chunk headers are the index: seek()
+    is a single record lookup whatever the length of the match, and nothing
+    is re-simulated. Poses are copied straight from the memory-mapped file.
+    """
+    min_speed = 1 / 16
+    max_speed = 64.0
+
+    def __init__(self, reader, arena):
+        if len(reader) == 0:
+            raise ValueError("Replay has no ticks")
+        self.reader = reader
+        self.arena = arena
+        self.playing = True
+        self.speed = 1.0  # Ticks per update()
+        self.direction = 1  # 1 plays forward, -1 in reverse
+        self.tick = 0
+        self._fraction = 0.0  # Carry-over of fractional speeds
+        self._applied_tick = None
+        self.seek(0)
+
+    @property
+    def num_ticks(self):
+        return len(self.reader)
+
+    def seek(self, tick):
+        """Jump to a tick (clamped to the recording)"""
+        if self._move(tick):
+            self.arena.jump_count += 1  # Not motion; don't interpolate from the old poses
+
+    def step(self, count=1):
+        """Move count ticks (negative for backwards), e.g. frame by frame while paused"""
+        self.seek(self.tick + count)
+
+    def _move(self, tick):
+        # Apply a tick; returns whether the poses changed
+        self.tick = max(0, min(self.num_ticks - 1, int(tick)))
+        if self.tick == self._applied_tick:
+            return False
+        self.reader.apply(self.tick, self.arena)
+        self._applied_tick = self.tick
+        return True
+
+    def toggle_pause(self):
+        self.playing = not self.playing
+        self._fraction = 0.0
+
+    def reverse(self):
+        self.direction = -self.direction
+
+    def faster(self):
+        self.speed = min(self.max_speed, self.speed * 2)
+
+    def slower(self):
+        self.speed = max(self.min_speed, self.speed / 2)
+
+    def update(self):
+        """Advance by one displayed frame at the current speed and direction"""
+        if not self.playing:
+            return
+        self._fraction += self.speed
+        ticks = int(self._fraction)
+        self._fraction -= ticks
+        if ticks:
+            self._move(self.tick + self.direction * ticks)  # Played, so drawn blended
+            # Stop at either end instead of spinning there
+            if self.tick in (0, self.num_ticks - 1):
+                self.playing = False
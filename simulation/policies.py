@@ -0,0 +1,150 @@
+import importlib
+import queue
+import threading
+
+import numpy as np
+
+from . import actions
+from .capture_flag_env import (CaptureFlagEnv, OBS_OWN_POS, OBS_OWN_HEADING, OBS_OWN_FLAG_POS,
+                               OBS_ENEMY_FLAG_POS, OBS_OWN_CARRYING)
+
+# A policy is any callable mapping a (k, OBS_SIZE) float32 batch of
+# CaptureFlagEnv observations to k action bitmasks, e.g. a learned model's
+# forward pass followed by an argmax over the 64 bitmasks.
+
+class ScriptedPolicy:
+    """Hand-written bot: fetch the enemy flag, then carry it back across the wall.
+
+    Climbs to a cruise height over the obstacles while the target is more
+    than descend_distance away, then drops to the target's height. The side
+    whose flag is at positive x cruises lane_gap higher, and bots aim lane
+    units to the right of far targets, as seen flying across the arena, so
+    the two sides pass instead of blocking each other head on.
+    Turns towards the target and only moves forward while roughly facing
+    it. Works on the whole batch at once.
+    """
+
+    def __init__(self, cruise_height=2.0, lane_gap=2.5, descend_distance=4.0, lane=4.0, turn_tolerance=5.0,
+                 height_tolerance=0.3):
+        self.cruise_height = cruise_height
+        self.lane_gap = lane_gap
+        self.descend_distance = descend_distance
+        self.lane = lane
+        self.turn_tolerance = np.radians(turn_tolerance)
+        self.height_tolerance = height_tolerance
+
+    def __call__(self, obs):
+        position = obs[:, OBS_OWN_POS]
+        carrying = obs[:, OBS_OWN_CARRYING] > 0.5
+        own_flag = obs[:, OBS_OWN_FLAG_POS]
+        enemy_flag = obs[:, OBS_ENEMY_FLAG_POS]
+        # A carried flag scores as soon as it crosses the wall, so head for home
+        target = np.where(carrying[:, None], own_flag, enemy_flag)
+
+        dx = target[:, 0] - position[:, 0]
+        dz = target[:, 2] - position[:, 2]
+        far = np.hypot(dx, dz) > self.descend_distance
+        dz += np.where(far, np.sign(dx) * self.lane, 0.0)  # Right of travel along x is +z going +x
+        heading = obs[:, OBS_OWN_HEADING]
+        yaw = np.arctan2(heading[:, 0], heading[:, 1])
+        turn = (np.arctan2(dx, dz) - yaw + np.pi) % (2 * np.pi) - np.pi  # Left is positive
+
+        cruise = self.cruise_height + np.where(own_flag[:, 0] > 0, self.lane_gap, 0.0)
+        height = np.where(far, cruise, target[:, 1])
+        climb = height - position[:, 1]
+
+        result = np.full(len(obs), actions.NOOP, dtype=np.int32)
+        result[turn > self.turn_tolerance] |= actions.ROTATE_LEFT
+        result[turn < -self.turn_tolerance] |= actions.ROTATE_RIGHT
+        result[np.abs(turn) < np.pi / 4] |= actions.FORWARD
+        result[climb > self.height_tolerance] |= actions.UPWARD
+        result[climb < -self.height_tolerance] |= actions.DOWNWARD
+        return result
+
+def load_policy(spec):
+    """Policy from a command-line spec: 'bot' for ScriptedPolicy, or 'module:name'.
+
+    name may be a policy callable or a class, which is instantiated with no
+    arguments.
+    """
+    if spec == 'bot':
+        return ScriptedPolicy()
+    module_name, _, name = spec.partition(':')
+    if not name:
+        raise ValueError(f"Policy must be 'bot' or module:name, not {spec!r}")
+    policy = getattr(importlib.import_module(module_name), name)
+    return policy() if isinstance(policy, type) else policy
+
+class PolicyRunner:
+    """Drives a set of an arena's drones with one batched policy call per tick.
+
+    submit() observes the arena after a step and starts working out the
+    next tick's actions; collect() waits for them and writes them into an
+    action list for Arena.step. Observations are taken on the caller's
+    thread, so the arena may be changed (drawn, interpolated) as soon as
+    submit() returns. With asynchronous=True the policy runs on a worker
+    thread in between, overlapping whatever the caller does until collect(),
+    e.g. drawing the frame; otherwise it runs inside collect(). Either way
+    tick t + 1 acts on the state after tick t, so both give the same match.
+    """
+
+    def __init__(self, arena, policy, drone_indices, asynchronous=True):
+        self.policy = policy
+        self.drone_indices = np.asarray(drone_indices, dtype=np.intp)
+        self.env = CaptureFlagEnv(arena)
+        self.batch = np.empty((len(self.drone_indices), self.env.obs.shape[1]), dtype=np.float32)
+        self.result = None  # Actions of the last collected batch
+        self._pending = False
+        self._requests = None
+        self._results = None
+        self._thread = None
+        if asynchronous:
+            self._requests = queue.SimpleQueue()
+            self._results = queue.SimpleQueue()
+            self._thread = threading.Thread(target=self._work, name='policy', daemon=True)
+            self._thread.start()
+
+    def _work(self):
+        while True:
+            batch = self._requests.get()
+            if batch is None:
+                return
+            try:
+                self._results.put((self.policy(batch), None))
+            except Exception as error:
+                self._results.put((None, error))  # Raised again by collect()
+
+    def submit(self):
+        """Observe the arena and start computing actions for the next tick"""
+        if self._pending:
+            raise RuntimeError("collect() the previous batch before submitting another")
+        np.take(self.env.observe(), self.drone_indices, axis=0, out=self.batch)
+        self._pending = True
+        if self._thread is not None:
+            self._requests.put(self.batch)
+
+    def collect(self, out):
+        """Wait for the submitted batch and write its actions into out (indexed by drone)"""
+        if not self._pending:
+            self.submit()  # Nothing in flight yet, e.g. on the first tick
+        self._pending = False
+        if self._thread is None:
+            result = self.policy(self.batch)
+        else:
+            result, error = self._results.get()
+            if error is not None:
+                raise error
+        self.result = np.asarray(result, dtype=np.int32).reshape(len(self.drone_indices)) & actions.ALL_ACTIONS
+        for index, action in zip(self.drone_indices.tolist(), self.result.tolist()):
+            out[index] = action
+        return out
+
+    def close(self):
+        if self._thread is None:
+            return
+        if self._pending:
+            self._results.get()  # Let the batch in flight finish
+            self._pending = False
+        self._requests.put(None)
+        self._thread.join()
+        self._thread = None
@@ -0,0 +1,172 @@
+import numpy as np
+
+from .obstacles import OrientedBox
+
+# What a ray hit. The divider wall is not among them: drones fly through
+# it, so it stops no ray (see RaySensor.divider_distances)
+HIT_NONE = 0  # Nothing within max_range
+HIT_WALL = 1  # Container wall
+HIT_OBSTACLE = 2  # The rectangle or another obstacle box
+HIT_OPPONENT = 3
+HIT_TEAMMATE = 4
+HIT_FLAG = 5
+
+class RaySensor:
+    """Lidar-style sensor: horizontal rays fanned around every drone's heading.
+
+    All drones of the arena share one configuration, so cast() intersects
+    every ray of every drone with the scene in a few array operations: slab
+    tests against the container and the obstacle boxes, circle tests
+    against drones (spheres of their size) and flags (upright cylinders as
+    tall as the pole). Hidden obstacles, the caster itself and a flag it
+    carries are not seen.
+
+    offsets holds each ray's angle from the heading. With a fov of 360 the
+    rays go round evenly from straight ahead, otherwise they span the fov
+    from right to left. distances and classes, indexed [drone, ray], are
+    refilled in place by each cast(), as is divider_distances: how far
+    along each ray it passes through the divider wall, or max_range if it
+    stops (or runs out) first.
+    """
+
+    def __init__(self, arena, num_rays=16, fov=360.0, max_range=30.0):
+        self.arena = arena
+        self.num_rays = num_rays
+        self.max_range = max_range
+        if fov >= 360.0:
+            offsets = np.arange(num_rays) * (360.0 / num_rays)
+        elif num_rays > 1:
+            offsets = np.linspace(-fov / 2, fov / 2, num_rays)  # Lower yaw is to the right
+        else:
+            offsets = np.zeros(1)
+        self.offsets = np.radians(offsets)
+
+        drones = arena.drones
+        teams = np.array([drone.team for drone in drones])
+        self._opponent = teams[:, None] != teams[None, :]
+        self._drone_radius = np.array([drone.size for drone in drones])
+        self._flag_radius = np.array([flag.size for flag in arena.flags])
+        self._flag_height = self._flag_radius * 3  # Pole height, as drawn
+        self.distances = np.empty((len(drones), num_rays), dtype=np.float32)
+        self.classes = np.empty((len(drones), num_rays), dtype=np.int8)
+        self.divider_distances = np.empty((len(drones), num_rays), dtype=np.float32)
+        self._tree = None  # Obstacle tree the box arrays were made from
+
+    def _update_boxes(self):
+        # Bare obstacle boxes as arrays; rebuilt only when the arena rebuilds its obstacles
+        arena = self.arena
+        if self._tree is arena.obstacle_tree:
+            return
+        boxes = [OrientedBox(body) for body in arena.obstacles]
+        self._box_center = np.array([(b.center_x, b.center_y, b.center_z) for b in boxes]).reshape(-1, 3)
+        self._box_cos = np.array([b.cos for b in boxes])
+        self._box_sin = np.array([b.sin for b in boxes])
+        self._box_half = np.array([(b.half_x, b.half_y, b.half_z) for b in boxes]).reshape(-1, 3)
+        self._tree = arena.obstacle_tree
+
+    def cast(self):
+        """Cast every ray; returns (distances, classes)"""
+        arena = self.arena
+        registry = arena.registry
+        origins = registry.positions[arena.drone_rows]
+        angles = np.radians(registry.rotations[arena.drone_rows, 1])[:, None] + self.offsets
+        dir_x = np.sin(angles)
+        dir_z = np.cos(angles)
+        ox = origins[:, 0:1]
+        oz = origins[:, 2:3]
+
+        best = np.full(angles.shape, float(self.max_range))
+        classes = self.classes
+        classes.fill(HIT_NONE)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            # Container walls, seen from inside; rays are level, so only the side walls
+            half_width = arena.width / 2
+            half_depth = arena.depth / 2
+            tx = np.where(dir_x > 0, (half_width - ox) / dir_x, np.where(dir_x < 0, (-half_width - ox) / dir_x, np.inf))
+            tz = np.where(dir_z > 0, (half_depth - oz) / dir_z, np.where(dir_z < 0, (-half_depth - oz) / dir_z, np.inf))
+            self._keep_closer(best, np.minimum(tx, tz), HIT_WALL)
+
+            self._update_boxes()
+            if len(self._box_cos):
+                self._keep_closer(best, self._box_hits(origins, dir_x, dir_z), HIT_OBSTACLE)
+
+            # Drones: level rays cut a sphere in a circle whose radius depends on the height gap
+            rel = registry.positions[arena.drone_rows][None, :, :] - origins[:, None, :]
+            radius_sq = self._drone_radius ** 2 - rel[:, :, 1] ** 2
+            np.fill_diagonal(radius_sq, -1.0)  # Never see yourself
+            t = self._circle_hits(rel, radius_sq, dir_x, dir_z)
+            nearest = np.argmin(t, axis=2)
+            t = np.take_along_axis(t, nearest[:, :, None], axis=2)[:, :, 0]
+            hit_class = np.where(np.take_along_axis(self._opponent, nearest, axis=1), HIT_OPPONENT, HIT_TEAMMATE)
+            self._keep_closer(best, t, hit_class)
+
+            # Flags: upright cylinders from the flag's position to the top of the pole
+            rel = registry.positions[arena.flag_rows][None, :, :] - origins[:, None, :]
+            height = -rel[:, :, 1]  # Ray height above each flag's base
+            radius_sq = np.where((height >= 0) & (height <= self._flag_height), self._flag_radius ** 2, -1.0)
+            for i, drone in enumerate(arena.drones):
+                if drone.captured_flag is not None:
+                    radius_sq[i, arena.flags.index(drone.captured_flag)] = -1.0
+            self._keep_closer(best, self._circle_hits(rel, radius_sq, dir_x, dir_z).min(axis=2), HIT_FLAG)
+
+            # Divider wall: the plane x = wall_x across the whole arena, passed through
+            t = (arena.divider_wall.position[0] - ox) / dir_x
+            self.divider_distances[:] = np.where((t > 0) & (t < best), t, self.max_range)
+
+        self.distances[:] = best
+        return self.distances, classes
+
+    def _keep_closer(self, best, t, hit_class):
+        closer = t < best
+        np.copyto(best, t, where=closer)
+        np.copyto(self.classes, hit_class, where=closer)
+
+    @staticmethod
+    def _circle_hits(rel, radius_sq, dir_x, dir_z):
+        """Distance along each ray [caster, ray] to each XZ circle [caster, target]; inf for a miss.
+
+        rel is the circle centres relative to the casters and radius_sq their
+        squared radii, negative for circles to ignore.
+        """
+        gap_sq = rel[:, :, 0] ** 2 + rel[:, :, 2] ** 2 - radius_sq  # Centre distance squared less radius squared
+        gap_sq[radius_sq < 0] = np.inf
+        along = rel[:, None, :, 0] * dir_x[:, :, None]
+        along += rel[:, None, :, 2] * dir_z[:, :, None]
+        discriminant = along * along
+        discriminant -= gap_sq[:, None, :]
+
+        # Only the rays that do reach a circle ahead need the square root
+        t = np.full(along.shape, np.inf)
+        hit = (discriminant >= 0) & (along > 0)
+        t[hit] = along[hit] - np.sqrt(discriminant[hit])
+        t[t <= 0] = np.inf  # Casters inside a circle do not see it
+        return t
+
+    def _box_hits(self, origins, dir_x, dir_z):
+        """Distance along each ray to the nearest visible obstacle box; 0 from inside one"""
+        visible = np.array([body.visible for body in self.arena.obstacles])
+        cos = self._box_cos
+        sin = self._box_sin
+        half = self._box_half
+
+        # Ray origins and directions in each box's frame: [caster, ray, box]
+        dx = origins[:, 0:1, None] - self._box_center[:, 0]
+        dz = origins[:, 2:3, None] - self._box_center[:, 2]
+        local_x = cos * dx - sin * dz
+        local_z = sin * dx + cos * dz
+        local_dir_x = cos * dir_x[:, :, None] - sin * dir_z[:, :, None]
+        local_dir_z = sin * dir_x[:, :, None] + cos * dir_z[:, :, None]
+        in_height = np.abs(origins[:, 1:2, None] - self._box_center[:, 1]) <= half[:, 1]
+
+        ta = (-half[:, 0] - local_x) / local_dir_x
+        tb = (half[:, 0] - local_x) / local_dir_x
+        enter = np.minimum(ta, tb)
+        leave = np.maximum(ta, tb)
+        ta = (-half[:, 2] - local_z) / local_dir_z
+        tb = (half[:, 2] - local_z) / local_dir_z
+        enter = np.maximum(enter, np.minimum(ta, tb))
+        leave = np.minimum(leave, np.maximum(ta, tb))
+
+        hit = visible & in_height & (enter <= leave) & (leave > 0)
+        return np.where(hit, np.maximum(enter, 0.0), np.inf).min(axis=2)
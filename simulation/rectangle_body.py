@@ -0,0 +1,15 @@
+from .entity import Entity
+
+class RectangleBody(Entity):
+    __slots__ = ('visible', 'height', 'width', 'depth')
+    
+    def __init__(self, width=8.0, height=6.0, depth=3.0):
+        super().__init__()
+        self.visible = True
+        self.height = height  # Height (Y axis)
+        self.width = width  # Width (X axis)
+        self.depth = depth  # Depth (Z axis)
+        self.position = [0.0, -5.0, 0.0]  # Start at floor level
+        
+    def toggle(self):
+        self.visible = not self.visible
@@ -0,0 +1,256 @@
+import mmap
+
+import numpy as np
+
+# File layout: a file header, the team of every drone, then chunks. Each chunk
+# is a CHUNK_HEADER followed by room for chunk_ticks fixed-size records.
+MAGIC = b'GLREPLAY'
+CHUNK_MAGIC = b'CHNK'
+VERSION = 1
+
+FILE_HEADER = np.dtype([
+    ('magic', 'S8'),
+    ('version', '<u2'),
+    ('num_drones', '<u2'),
+    ('num_flags', '<u2'),
+    ('tick_rate', '<u2'),  # Ticks per second of game time; 0 if unknown
+    ('chunk_ticks', '<u4'),
+    ('record_size', '<u4'),
+    ('arena_size', '<f4', (3,)),  # width, height, depth
+])
+
+CHUNK_HEADER = np.dtype({
+    'names': ['magic', 'index', 'first_tick', 'tick_count'],
+    'formats': ['S4', '<u4', '<u8', '<u4'],
+    'offsets': [0, 4, 8, 16],
+    'itemsize': 32,
+})
+
+def record_dtype(num_drones, num_flags):
+    """One tick of a match, packed with no padding"""
+    return np.dtype([
+        ('drone_pose', '<f4', (num_drones, 4)),  # x, y, z, yaw in degrees
+        ('flag_pos', '<f4', (num_flags, 3)),
+        ('carrier', 'i1', (num_flags,)),  # Index of the drone carrying each flag, or -1
+        ('rectangle_visible', 'i1'),
+    ])
+
+def _data_offset(num_drones):
+    # Header plus one team byte per drone, rounded up to 16 bytes
+    size = FILE_HEADER.itemsize + num_drones
+    return (size + 15) // 16 * 16
+
+class ReplayRecorder:
+    """Appends the state of an Arena to a replay file once per tick.
+
+    Records are written through a memory map of the current chunk; when it
+    fills up, the file grows by one chunk and the map moves on. Each chunk
+    header carries the number of records written so far, so a file cut off
+    mid-session is still readable. close() trims the unused tail.
+    """
+
+    def __init__(self, path, arena, chunk_ticks=4096):
+        self.arena = arena
+        self.chunk_ticks = chunk_ticks
+        self.num_drones = len(arena.drones)
+        self.num_flags = len(arena.flags)
+        self.record_dtype = record_dtype(self.num_drones, self.num_flags)
+        self.chunk_size = CHUNK_HEADER.itemsize + chunk_ticks * self.record_dtype.itemsize
+        self.data_offset = _data_offset(self.num_drones)
+        self.num_ticks = 0
+        self._flag_index = {flag: f for f, flag in enumerate(arena.flags)}
+
+        header = np.zeros(1, dtype=FILE_HEADER)
+        header['magic'] = MAGIC
+        header['version'] = VERSION
+        header['num_drones'] = self.num_drones
+        header['num_flags'] = self.num_flags
+        header['tick_rate'] = round(arena.tick_rate)
+        header['chunk_ticks'] = chunk_ticks
+        header['record_size'] = self.record_dtype.itemsize
+        header['arena_size'] = (arena.width, arena.height, arena.depth)
+        teams = np.array([drone.team for drone in arena.drones], dtype=np.int8)
+
+        self._file = open(path, 'w+b')
+        self._file.write(header.tobytes())
+        self._file.write(teams.tobytes())
+        self._file.truncate(self.data_offset)
+
+        self._mmap = None
+        self._chunk_index = -1
+        self._row = chunk_ticks  # Forces a new chunk on the first record()
+
+    def _next_chunk(self):
+        self._release_chunk()
+        self._chunk_index += 1
+        offset = self.data_offset + self._chunk_index * self.chunk_size
+        self._file.truncate(offset + self.chunk_size)
+
+        # mmap offsets must be multiples of the allocation granularity
+        map_offset = offset - offset % mmap.ALLOCATIONGRANULARITY
+        self._mmap = mmap.mmap(self._file.fileno(), offset + self.chunk_size - map_offset,
+                               offset=map_offset)
+        start = offset - map_offset
+        self._chunk_header = np.ndarray((), dtype=CHUNK_HEADER, buffer=self._mmap, offset=start)
+        self._chunk_header['magic'] = CHUNK_MAGIC
+        self._chunk_header['index'] = self._chunk_index
+        self._chunk_header['first_tick'] = self.num_ticks
+        self._chunk_header['tick_count'] = 0
+
+        # Column views, so record() does no structured-field lookups
+        records = np.ndarray(self.chunk_ticks, dtype=self.record_dtype, buffer=self._mmap,
+                             offset=start + CHUNK_HEADER.itemsize)
+        self._pose = records['drone_pose']
+        self._flag_pos = records['flag_pos']
+        self._carrier = records['carrier']
+        self._rectangle_visible = records['rectangle_visible']
+        self._row = 0
+
+    def _release_chunk(self):
+        if self._mmap is None:
+            return
+        # Views must go before the map can be closed
+        self._chunk_header = self._pose = self._flag_pos = None
+        self._carrier = self._rectangle_visible = None
+        self._mmap.flush()
+        self._mmap.close()
+        self._mmap = None
+
+    def record(self):
+        """Append the arena's current state as the next tick"""
+        if self._row == self.chunk_ticks:
+            self._next_chunk()
+        arena = self.arena
+        registry = arena.registry
+        row = self._row
+
+        pose = self._pose[row]
+        pose[:, 0:3] = registry.positions[arena.drone_rows]
+        pose[:, 3] = registry.rotations[arena.drone_rows, 1]
+        self._flag_pos[row] = registry.positions[arena.flag_rows]
+        carrier = self._carrier[row]
+        carrier.fill(-1)
+        for i, drone in enumerate(arena.drones):
+            if drone.captured_flag is not None:
+                carrier[self._flag_index[drone.captured_flag]] = i
+        self._rectangle_visible[row] = arena.rectangle.visible
+
+        self._row = row + 1
+        self._chunk_header['tick_count'] = self._row
+        self.num_ticks += 1
+
+    def close(self):
+        if self._file is None:
+            return
+        used = self._row if self._mmap is not None else 0
+        self._release_chunk()
+        if self._chunk_index >= 0:
+            # Drop the unused records of the last chunk
+            self._file.truncate(self.data_offset + self._chunk_index * self.chunk_size +
+                                CHUNK_HEADER.itemsize + used * self.record_dtype.itemsize)
+        self._file.close()
+        self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class ReplayReader:
+    """Read-only, memory-mapped view of a replay file.
+
+    Nothing is loaded up front beyond the chunk headers; reader[tick] is a
+    structured NumPy record backed by the map. Ticks beyond the last
+    complete record (e.g. of a file still being written) are not visible.
+    """
+
+    def __init__(self, path):
+        self._file = open(path, 'rb')
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        header = np.frombuffer(self._mmap, dtype=FILE_HEADER, count=1)[0]
+        if header['magic'] != MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a replay file")
+        if header['version'] != VERSION:
+            self.close()
+            raise ValueError(f"Unsupported replay version {header['version']}")
+
+        self.num_drones = int(header['num_drones'])
+        self.num_flags = int(header['num_flags'])
+        self.chunk_ticks = int(header['chunk_ticks'])
+        self.tick_rate = int(header['tick_rate']) or 60
+        self.arena_size = tuple(float(v) for v in header['arena_size'])
+        self.teams = np.frombuffer(self._mmap, dtype=np.int8, count=self.num_drones,
+                                   offset=FILE_HEADER.itemsize).copy()
+        self.record_dtype = record_dtype(self.num_drones, self.num_flags)
+        if header['record_size'] != self.record_dtype.itemsize:
+            self.close()
+            raise ValueError("Replay record size does not match its header")
+        chunk_size = CHUNK_HEADER.itemsize + self.chunk_ticks * self.record_dtype.itemsize
+
+        # One records array per chunk; every chunk but the last is full
+        self._chunks = []
+        self.num_ticks = 0
+        offset = _data_offset(self.num_drones)
+        file_size = len(self._mmap)
+        while offset + CHUNK_HEADER.itemsize <= file_size:
+            chunk = np.frombuffer(self._mmap, dtype=CHUNK_HEADER, count=1, offset=offset)[0]
+            if chunk['magic'] != CHUNK_MAGIC:
+                break
+            available = (file_size - offset - CHUNK_HEADER.itemsize) // self.record_dtype.itemsize
+            count = min(int(chunk['tick_count']), available)
+            self._chunks.append(np.frombuffer(self._mmap, dtype=self.record_dtype, count=count,
+                                              offset=offset + CHUNK_HEADER.itemsize))
+            self.num_ticks += count
+            if count < self.chunk_ticks:
+                break
+            offset += chunk_size
+
+    def __len__(self):
+        return self.num_ticks
+
+    def __getitem__(self, tick):
+        if tick < 0:
+            tick += self.num_ticks
+        if not 0 <= tick < self.num_ticks:
+            raise IndexError(f"Tick {tick} out of range")
+        chunk, row = divmod(tick, self.chunk_ticks)
+        return self._chunks[chunk][row]
+
+    def apply(self, tick, arena):
+        """Put an Arena (with the same drones and flags) into the recorded state of a tick"""
+        if len(arena.drones) != self.num_drones or len(arena.flags) != self.num_flags:
+            raise ValueError("Arena does not match the replay's drones and flags")
+        record = self[tick]
+        registry = arena.registry
+        pose = record['drone_pose']
+        registry.positions[arena.drone_rows] = pose[:, 0:3]
+        registry.rotations[arena.drone_rows, 1] = pose[:, 3]
+        registry.positions[arena.flag_rows] = record['flag_pos']
+        for drone in arena.drones:
+            drone.captured_flag = None
+        for f, carrier in enumerate(record['carrier']):
+            flag = arena.flags[f]
+            flag.carrier = arena.drones[carrier] if carrier >= 0 else None
+            if flag.carrier is not None:
+                flag.carrier.captured_flag = flag
+        arena.rectangle.visible = bool(record['rectangle_visible'])
+        arena.rebuild_grids()
+
+    def close(self):
+        if self._file is None:
+            return
+        self._chunks = []
+        try:
+            self._mmap.close()
+        except BufferError:
+            pass  # The caller still holds records; the mapping goes when they do
+        self._file.close()
+        self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,192 @@
+import multiprocessing as mp
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from .arena import Arena
+from .capture_flag_env import CaptureFlagEnv, OBS_SIZE
+
+# Values of the shared command word
+CMD_IDLE = 0
+CMD_STEP = 1
+CMD_RESET = 2
+CMD_CLOSE = 3
+
+def _buffer_specs(num_envs, num_agents):
+    """Name -> (shape, dtype) of every array shared with the workers"""
+    return {
+        'command': ((2,), np.int64),  # Command word, seed for CMD_RESET
+        'actions': ((num_envs, num_agents), np.int32),
+        'obs': ((num_envs, num_agents, OBS_SIZE), np.float32),
+        'final_obs': ((num_envs, num_agents, OBS_SIZE), np.float32),  # Last obs of an episode that just ended
+        'reward': ((num_envs, num_agents), np.float32),
+        'terminated': ((num_envs,), np.bool_),
+        'truncated': ((num_envs,), np.bool_),
+        'scorer': ((num_envs,), np.int8),
+    }
+
+def _attach(shm, shape, dtype):
+    return np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+
+def _worker(shm_names, num_envs, num_agents, env_range, barrier, arena_kwargs, env_kwargs):
+    blocks = {name: shared_memory.SharedMemory(name=shm_name)
+              for name, shm_name in shm_names.items()}
+    try:
+        bufs = {name: _attach(blocks[name], shape, dtype)
+                for name, (shape, dtype) in _buffer_specs(num_envs, num_agents).items()}
+        command = bufs['command']
+        lo, hi = env_range
+
+        # Envs write observations and rewards straight into shared memory
+        envs = [CaptureFlagEnv(Arena.create_default(**arena_kwargs), obs=bufs['obs'][i],
+                               reward=bufs['reward'][i], **env_kwargs)
+                for i in range(lo, hi)]
+
+        while True:
+            barrier.wait()  # Wait for a command
+            cmd = command[0]
+            if cmd == CMD_CLOSE:
+                break
+
+            if cmd == CMD_RESET:
+                seed = int(command[1])
+                for i, env in enumerate(envs, lo):
+                    env.reset(seed=None if seed < 0 else seed + i)
+                    bufs['reward'][i] = 0.0
+                    bufs['terminated'][i] = False
+                    bufs['truncated'][i] = False
+                    bufs['scorer'][i] = -1
+
+            elif cmd == CMD_STEP:
+                actions = bufs['actions']
+                for i, env in enumerate(envs, lo):
+                    _, _, terminated, truncated, info = env.step(actions[i])
+                    bufs['terminated'][i] = terminated
+                    bufs['truncated'][i] = truncated
+                    bufs['scorer'][i] = info['scorer']
+                    # Auto-reset; obs then holds the first observation of the next episode. The arena
+                    # defers a score's reset to this one, so the final obs is the scoring state
+                    if terminated or truncated:
+                        bufs['final_obs'][i] = bufs['obs'][i]
+                        env.reset()
+
+            barrier.wait()  # Signal completion
+    except Exception:
+        barrier.abort()
+        raise
+    finally:
+        for shm in blocks.values():
+            shm.close()
+
+class SharedMemoryVecEnv:
+    """Many CaptureFlagEnv instances hosted in worker processes.
+
+    Actions, observations, rewards and done flags live in
+    multiprocessing.shared_memory arrays; the only thing sent per step is a
+    command word followed by two barrier waits. obs, reward, terminated,
+    truncated and scorer are zero-copy NumPy views that are overwritten on
+    every step, and finished arenas are reset automatically; as in Gym,
+    their last observation is kept in info['final_observation']. Each
+    arena is Arena.create_default(**arena_kwargs), e.g. team_size=2 for
+    num_agents = 4 drones per arena.
+    """
+
+    def __init__(self, num_envs, num_workers=None, env_kwargs=None, context=None, arena_kwargs=None):
+        if num_workers is None:
+            num_workers = min(num_envs, mp.cpu_count())
+        num_workers = max(1, min(num_workers, num_envs))
+        ctx = mp.get_context(context)
+        arena_kwargs = arena_kwargs or {}
+        self.num_envs = num_envs
+        self.num_workers = num_workers
+        self.num_agents = len(Arena.create_default(**arena_kwargs).drones)
+        self.closed = False
+
+        self._blocks = {}
+        self._buffers = {}
+        for name, (shape, dtype) in _buffer_specs(num_envs, self.num_agents).items():
+            size = max(1, int(np.prod(shape)) * np.dtype(dtype).itemsize)
+            shm = shared_memory.SharedMemory(create=True, size=size)
+            self._blocks[name] = shm
+            self._buffers[name] = _attach(shm, shape, dtype)
+            self._buffers[name].fill(0)
+
+        self._command = self._buffers['command']
+        self.actions = self._buffers['actions']
+        self.obs = self._buffers['obs']
+        self.reward = self._buffers['reward']
+        self.terminated = self._buffers['terminated']
+        self.truncated = self._buffers['truncated']
+        self.scorer = self._buffers['scorer']
+        self.final_obs = self._buffers['final_obs']
+        self.info = {'final_observation': self.final_obs, 'scorer': self.scorer}
+
+        self._barrier = ctx.Barrier(num_workers + 1)
+        shm_names = {name: shm.name for name, shm in self._blocks.items()}
+        bounds = np.linspace(0, num_envs, num_workers + 1).astype(int)
+        self._workers = []
+        for w in range(num_workers):
+            proc = ctx.Process(
+                target=_worker,
+                args=(shm_names, num_envs, self.num_agents, (bounds[w], bounds[w + 1]),
+                      self._barrier, arena_kwargs, env_kwargs or {}),
+                daemon=True,
+            )
+            proc.start()
+            self._workers.append(proc)
+
+    def _run(self, cmd, arg=0):
+        self._command[0] = cmd
+        self._command[1] = arg
+        self._barrier.wait()  # Release the workers
+        if cmd != CMD_CLOSE:
+            self._barrier.wait()  # Wait until every worker is done
+
+    def reset(self, seed=None):
+        """Reset every arena; arena i gets seed + i. Returns the shared obs view"""
+        self._run(CMD_RESET, -1 if seed is None else seed)
+        return self.obs
+
+    def step(self, actions=None):
+        """Step every arena in lockstep.
+
+        actions is copied into the shared action buffer; pass None if it was
+        already written to self.actions. Returns shared views of
+        (obs, reward, terminated, truncated, info). Rows of obs whose arena
+        finished already start the next episode; info['final_observation']
+        holds the observation they ended on.
+        """
+        if actions is not None:
+            self.actions[...] = actions
+        self._run(CMD_STEP)
+        return self.obs, self.reward, self.terminated, self.truncated, self.info
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            self._run(CMD_CLOSE)
+        except Exception:
+            pass
+        for proc in self._workers:
+            proc.join(timeout=5)
+            if proc.is_alive():
+                proc.terminate()
+        # Drop our views before releasing the mappings
+        self._buffers.clear()
+        self._command = self.actions = self.obs = self.reward = None
+        self.terminated = self.truncated = self.scorer = None
+        self.final_obs = self.info = None
+        for shm in self._blocks.values():
+            try:
+                shm.close()
+            except BufferError:
+                pass  # The caller still holds views; the mapping goes when they do
+            shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,103 @@
+import asyncio
+import os
+import threading
+
+def parse_address(address):
+    """'unix:PATH' for a Unix socket, otherwise 'HOST:PORT' (HOST may be empty for all interfaces)"""
+    if address.startswith('unix:'):
+        return address[5:], None
+    host, _, port = address.rpartition(':')
+    return host or None, int(port)
+
+async def open_connection(address):
+    """asyncio (reader, writer) connected to an address as taken by parse_address"""
+    host, port = parse_address(address)
+    if port is None:
+        return await asyncio.open_unix_connection(host)
+    return await asyncio.open_connection(host, port)
+
+class SocketServer:
+    """asyncio stream server running on a thread of its own.
+
+    For code that runs tick by tick on the main thread: the loop handles
+    all socket I/O, and call_soon() hands it work without blocking.
+    Subclasses implement the coroutine _serve_client(reader, writer); the
+    writer is closed when it returns.
+    """
+    thread_name = 'socket-server'
+
+    def __init__(self):
+        self.address = None  # Bound (host, port) or socket path, once started
+        self._loop = None
+        self._thread = None
+        self._server = None
+        self._unix_path = None
+        self._writers = set()  # Open connections; loop thread only
+
+    def start(self, address):
+        """Listen on an address as taken by parse_address; returns once bound"""
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name=self.thread_name, daemon=True)
+        self._thread.start()
+        host, port = parse_address(address)
+        try:
+            asyncio.run_coroutine_threadsafe(self._listen(host, port), self._loop).result()
+        except Exception:
+            self.close()
+            raise
+        return self
+
+    async def _listen(self, host, port):
+        if port is None:
+            self._server = await asyncio.start_unix_server(self._accept, host)
+            self._unix_path = host
+            self.address = host
+        else:
+            self._server = await asyncio.start_server(self._accept, host, port)
+            self.address = self._server.sockets[0].getsockname()[:2]
+
+    async def _accept(self, reader, writer):
+        self._writers.add(writer)
+        try:
+            await self._serve_client(reader, writer)
+        finally:
+            self._writers.discard(writer)
+            writer.close()
+
+    async def _serve_client(self, reader, writer):
+        raise NotImplementedError
+
+    def call_soon(self, callback, *args):
+        """Run callback(*args) on the loop thread; does nothing before start()"""
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(callback, *args)
+
+    def close(self):
+        if self._loop is None:
+            return
+        if self._loop.is_running():
+            asyncio.run_coroutine_threadsafe(self._shutdown(), self._loop).result()
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+        self._loop.close()
+        self._loop = None
+        if self._unix_path is not None:
+            try:
+                os.unlink(self._unix_path)
+            except OSError:
+                pass
+            self._unix_path = None
+
+    async def _shutdown(self):
+        if self._server is not None:
+            self._server.close()
+        for writer in list(self._writers):
+            writer.close()
+        if self._server is not None:
+            await self._server.wait_closed()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
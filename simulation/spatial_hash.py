@@ -0,0 +1,70 @@
+import math
+
+class SpatialHash:
+    """Uniform grid over the XZ plane for "what is near this point" queries.
+
+    Entities are bucketed by the cell their position falls in. With cells at
+    least as large as the query radius, a query visits at most 3x3 cells no
+    matter how many entities there are. update() moves an entity between
+    cells only when it crossed a cell boundary.
+    """
+
+    def __init__(self, cell_size=3.0):
+        self.cell_size = cell_size
+        self.cells = {}  # (ix, iz) -> list of entities
+        self.entity_cells = {}  # entity -> (ix, iz)
+
+    def _cell(self, x, z):
+        return (math.floor(x / self.cell_size), math.floor(z / self.cell_size))
+
+    def clear(self):
+        self.cells.clear()
+        self.entity_cells.clear()
+
+    def insert(self, entity):
+        key = self._cell(entity.position[0], entity.position[2])
+        self.cells.setdefault(key, []).append(entity)
+        self.entity_cells[entity] = key
+
+    def remove(self, entity):
+        key = self.entity_cells.pop(entity)
+        bucket = self.cells[key]
+        bucket.remove(entity)
+        if not bucket:
+            del self.cells[key]
+
+    def update(self, entity):
+        """Re-bucket an entity after it moved"""
+        key = self._cell(entity.position[0], entity.position[2])
+        old_key = self.entity_cells.get(entity)
+        if key == old_key:
+            return
+        if old_key is not None:
+            self.remove(entity)
+        self.cells.setdefault(key, []).append(entity)
+        self.entity_cells[entity] = key
+
+    def rebuild(self, entities):
+        self.clear()
+        for entity in entities:
+            self.insert(entity)
+
+    def query(self, x, y, z, radius):
+        """Entities whose position is within radius of (x, y, z), boundary included"""
+        radius_squared = radius * radius
+        min_ix, min_iz = self._cell(x - radius, z - radius)
+        max_ix, max_iz = self._cell(x + radius, z + radius)
+        found = []
+        for ix in range(min_ix, max_ix + 1):
+            for iz in range(min_iz, max_iz + 1):
+                bucket = self.cells.get((ix, iz))
+                if not bucket:
+                    continue
+                for entity in bucket:
+                    pos = entity.position
+                    dx = x - pos[0]
+                    dy = y - pos[1]
+                    dz = z - pos[2]
+                    if dx * dx + dy * dy + dz * dz <= radius_squared:
+                        found.append(entity)
+        return found
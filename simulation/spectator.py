@@ -0,0 +1,301 @@
+import collections
+import socket
+import threading
+
+import numpy as np
+
+from .socket_server import SocketServer, parse_address
+
+# Wire format, all little-endian. On joining, a spectator is sent the
+# STREAM_HEADER, one team byte per drone and the (width, height, depth) of
+# every obstacle (<f4), then a KEYFRAME holding every pose. After that it
+# gets one DELTA per tick holding only the poses that changed. Both frame
+# kinds are a FRAME_HEADER, the visibility of every obstacle as packed
+# bits, then count POSE records.
+MAGIC = b'GLSP'
+VERSION = 1
+
+STREAM_HEADER = np.dtype([
+    ('magic', 'S4'),
+    ('version', '<u2'),
+    ('tick_rate', '<u2'),
+    ('num_objects', '<u2'),  # Registry rows: drones, flags, bases, divider wall, obstacles
+    ('num_drones', '<u2'),
+    ('num_obstacles', '<u2'),
+    ('arena_size', '<f4', (3,)),  # width, height, depth
+])
+
+FRAME_HEADER = np.dtype([
+    ('kind', 'u1'),
+    ('tick', '<u4'),
+    ('jumps', '<u2'),  # Arena jump count, wrapping; a change means poses jumped
+    ('count', '<u2'),
+])
+
+KEYFRAME = 0
+DELTA = 1
+
+# Poses are quantized: positions to POSITION_STEP units (so within +-128 of
+# the centre) and angles to 1/65536 of a turn
+POSITION_STEP = 1 / 256
+ANGLE_STEP = 360 / 65536
+
+POSE = np.dtype([
+    ('index', '<u2'),
+    ('position', '<i2', (3,)),
+    ('rotation', '<u2', (3,)),
+])
+
+class SnapshotEncoder:
+    """Encodes an arena's poses as spectator frames.
+
+    positions and rotations hold the quantized poses as of the last
+    delta(), which is what every spectator that has followed the stream
+    has. Deltas are taken against them rather than against the unquantized
+    poses, so rounding never builds up, and a keyframe() of them brings a
+    new spectator level with the others.
+    """
+
+    def __init__(self, arena):
+        self.arena = arena
+        registry = arena.registry
+        self.tick = 0
+        self.positions, self.rotations = self._quantize(registry.positions, registry.rotations)
+        self.visible = self._visible()
+        self._records = np.zeros(len(registry), dtype=POSE)
+        self._records['index'] = np.arange(len(registry))
+        self._frame = np.zeros(1, dtype=FRAME_HEADER)
+
+    @staticmethod
+    def _quantize(positions, rotations):
+        quantized_positions = np.clip(np.rint(positions / POSITION_STEP), -32768, 32767).astype(np.int16)
+        quantized_rotations = (np.rint(rotations / ANGLE_STEP).astype(np.int64) % 65536).astype(np.uint16)
+        return quantized_positions, quantized_rotations
+
+    def _visible(self):
+        return np.packbits([obstacle.visible for obstacle in self.arena.obstacles]).tobytes()
+
+    def header(self):
+        """Stream header, teams and obstacle sizes, as sent to every new spectator"""
+        arena = self.arena
+        header = np.zeros(1, dtype=STREAM_HEADER)
+        header['magic'] = MAGIC
+        header['version'] = VERSION
+        header['tick_rate'] = round(arena.tick_rate)
+        header['num_objects'] = len(arena.registry)
+        header['num_drones'] = len(arena.drones)
+        header['num_obstacles'] = len(arena.obstacles)
+        header['arena_size'] = (arena.width, arena.height, arena.depth)
+        teams = np.array([drone.team for drone in arena.drones], dtype=np.int8)
+        sizes = np.array([(body.width, body.height, body.depth) for body in arena.obstacles], dtype='<f4')
+        return header.tobytes() + teams.tobytes() + sizes.tobytes()
+
+    def delta(self):
+        """Frame of what changed since the last delta; advances the tick"""
+        registry = self.arena.registry
+        positions, rotations = self._quantize(registry.positions, registry.rotations)
+        changed = np.flatnonzero((positions != self.positions).any(axis=1) |
+                                 (rotations != self.rotations).any(axis=1))
+        self.positions = positions
+        self.rotations = rotations
+        self.visible = self._visible()
+        self.tick += 1
+        return self._encode(DELTA, changed)
+
+    def keyframe(self):
+        """Frame of every pose as of the last delta"""
+        return self._encode(KEYFRAME, slice(None))
+
+    def _encode(self, kind, rows):
+        records = self._records[rows]
+        records['position'] = self.positions[rows]
+        records['rotation'] = self.rotations[rows]
+        frame = self._frame
+        frame['kind'] = kind
+        frame['tick'] = self.tick
+        frame['jumps'] = self.arena.jump_count % 65536
+        frame['count'] = len(records)
+        return frame.tobytes() + self.visible + records.tobytes()
+
+class _Spectator:
+    __slots__ = ('writer', 'needs_keyframe')
+
+    def __init__(self, writer):
+        self.writer = writer
+        self.needs_keyframe = True
+
+class SpectatorServer(SocketServer):
+    """Broadcasts an arena's poses to any number of spectators.
+
+    submit() after each tick encodes one delta, which goes out to every
+    spectator as the same bytes, so the work per tick does not grow with
+    the audience. A spectator gets a keyframe (encoded once for everyone
+    who needs one that tick) when it joins, and again if it fell more than
+    max_buffer bytes behind: rather than queue deltas for it, the server
+    drops them and resynchronizes it once it has caught up.
+    """
+    thread_name = 'spectator-server'
+
+    def __init__(self, arena, max_buffer=1 << 18):
+        super().__init__()
+        self.encoder = SnapshotEncoder(arena)
+        self.max_buffer = max_buffer
+        self._header = self.encoder.header()
+        self._spectators = []  # Loop thread only
+        self._keyframe_wanted = False  # Whether the next submit() should encode a keyframe
+
+    @property
+    def num_spectators(self):
+        return len(self._spectators)
+
+    async def _serve_client(self, reader, writer):
+        spectator = _Spectator(writer)
+        writer.write(self._header)
+        self._spectators.append(spectator)
+        self._keyframe_wanted = True
+        try:
+            while await reader.read(1 << 12):
+                pass  # Spectators have nothing to say; wait for them to leave
+        except ConnectionError:
+            pass
+        finally:
+            self._spectators.remove(spectator)
+
+    def submit(self):
+        """Encode the tick just taken and send it to every spectator"""
+        delta = self.encoder.delta()
+        keyframe = self.encoder.keyframe() if self._keyframe_wanted else None
+        self.call_soon(self._send, delta, keyframe)
+
+    def _send(self, delta, keyframe):
+        wanted = False
+        for spectator in self._spectators:
+            transport = spectator.writer.transport
+            if transport.is_closing():
+                continue
+            if transport.get_write_buffer_size() > self.max_buffer:
+                spectator.needs_keyframe = True  # Too far behind for deltas; resync once drained
+            elif not spectator.needs_keyframe:
+                spectator.writer.write(delta)
+            elif keyframe is not None:
+                spectator.writer.write(keyframe)
+                spectator.needs_keyframe = False
+            wanted = wanted or spectator.needs_keyframe
+        self._keyframe_wanted = wanted
+
+class SpectatorFeed:
+    """Viewer end of a spectator stream, applying it to a local arena.
+
+    Connecting reads the stream header: arena_size, tick_rate, teams and
+    obstacle_sizes describe the match, for building an arena with the same
+    objects in the same order. start() then receives frames on a thread
+    and update(), called once per tick, applies them in order. Playback
+    starts once buffer_ticks frames have arrived, so network jitter is
+    absorbed; if more than max_backlog pile up, update() applies the extra
+    ones at once to catch up. Drawing with a PoseInterpolator captured
+    before each update() gives smooth motion between ticks.
+    """
+
+    def __init__(self, address, buffer_ticks=2, max_backlog=6):
+        host, port = parse_address(address)
+        if port is None:
+            self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self._socket.connect(host)
+        else:
+            self._socket = socket.create_connection((host or 'localhost', port))
+        self._file = self._socket.makefile('rb')
+        header = np.frombuffer(self._read(STREAM_HEADER.itemsize), dtype=STREAM_HEADER)[0]
+        if header['magic'] != MAGIC or header['version'] != VERSION:
+            self.close()
+            raise ValueError(f"{address} is not a spectator stream")
+        self.tick_rate = int(header['tick_rate']) or 60
+        self.arena_size = tuple(float(v) for v in header['arena_size'])
+        self.num_objects = int(header['num_objects'])
+        num_drones = int(header['num_drones'])
+        num_obstacles = int(header['num_obstacles'])
+        self.teams = np.frombuffer(self._read(num_drones), dtype=np.int8).copy()
+        self.obstacle_sizes = np.frombuffer(self._read(12 * num_obstacles), dtype='<f4').reshape(-1, 3).copy()
+        self._visible_size = (num_obstacles + 7) // 8
+
+        self.buffer_ticks = buffer_ticks
+        self.max_backlog = max_backlog
+        self.arena = None
+        self.tick = None  # Server tick of the frame last applied
+        self.connected = True
+        self._frames = collections.deque()
+        self._playing = False
+        self._jumps = None
+        self._thread = None
+
+    def _read(self, size):
+        data = self._file.read(size)
+        if len(data) < size:
+            raise ConnectionError("Spectator stream ended")
+        return data
+
+    def start(self, arena):
+        """Begin receiving into an arena built from the header"""
+        if len(arena.registry) != self.num_objects or len(arena.obstacles) != len(self.obstacle_sizes):
+            raise ValueError("Arena does not match the spectator stream's objects")
+        self.arena = arena
+        self._thread = threading.Thread(target=self._receive, name='spectator-feed', daemon=True)
+        self._thread.start()
+
+    def _receive(self):
+        head_size = FRAME_HEADER.itemsize + self._visible_size
+        try:
+            while True:
+                head = self._read(head_size)
+                count = int(np.frombuffer(head, dtype=FRAME_HEADER, count=1)[0]['count'])
+                self._frames.append(head + self._read(count * POSE.itemsize))
+        except (ConnectionError, OSError, ValueError):
+            pass
+        self.connected = False
+
+    @property
+    def backlog(self):
+        """Frames received but not yet applied"""
+        return len(self._frames)
+
+    def update(self):
+        """Apply the next tick, if it has arrived"""
+        frames = self._frames
+        if not self._playing:
+            if len(frames) < self.buffer_ticks:
+                return
+            self._playing = True
+        if not frames:
+            return  # Late; hold the last poses
+        self._apply(frames.popleft())
+        while len(frames) > self.max_backlog:
+            self._apply(frames.popleft())
+
+    def _apply(self, data):
+        arena = self.arena
+        registry = arena.registry
+        frame = np.frombuffer(data, dtype=FRAME_HEADER, count=1)[0]
+        offset = FRAME_HEADER.itemsize
+        visible = np.unpackbits(np.frombuffer(data, dtype=np.uint8, count=self._visible_size, offset=offset))
+        for obstacle, shown in zip(arena.obstacles, visible.tolist()):
+            obstacle.visible = bool(shown)
+        records = np.frombuffer(data, dtype=POSE, count=int(frame['count']), offset=offset + self._visible_size)
+        rows = records['index'].astype(np.intp)
+        registry.positions[rows] = records['position'] * POSITION_STEP
+        registry.rotations[rows] = records['rotation'] * ANGLE_STEP
+
+        # A keyframe or a jump on the server teleports the poses; don't interpolate across it
+        if frame['kind'] == KEYFRAME or frame['jumps'] != self._jumps:
+            arena.jump_count += 1
+        self._jumps = frame['jumps']
+        self.tick = int(frame['tick'])
+
+    def close(self):
+        try:
+            self._socket.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self._file.close()
+        self._socket.close()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
@@ -0,0 +1,68 @@
+"""Swept (continuous) overlap tests for straight-line moves.
+
+A move is tested along its whole segment, so nothing can step over an
+obstacle however large the step. A move that starts already overlapping
+only counts if it also ends overlapping, so objects can always separate;
+this matches the destination-only tests used before.
+"""
+
+def segment_enters_box(x0, y0, z0, x1, y1, z1, half_x, half_y, half_z):
+    """Whether the segment touches the closed box |x| <= half_x, |y| <= half_y, |z| <= half_z.
+
+    Obstacles transform the segment into their own frame before calling this.
+    """
+    if abs(x0) <= half_x and abs(y0) <= half_y and abs(z0) <= half_z:
+        return abs(x1) <= half_x and abs(y1) <= half_y and abs(z1) <= half_z
+
+    # Clip the segment against the slab of each axis (Liang-Barsky)
+    t_enter = 0.0
+    t_exit = 1.0
+    for start, end, half in ((x0, x1, half_x), (y0, y1, half_y), (z0, z1, half_z)):
+        delta = end - start
+        if delta == 0.0:
+            if abs(start) > half:
+                return False
+            continue
+        ta = (-half - start) / delta
+        tb = (half - start) / delta
+        if ta > tb:
+            ta, tb = tb, ta
+        if ta > t_enter:
+            t_enter = ta
+        if tb < t_exit:
+            t_exit = tb
+        if t_enter > t_exit:
+            return False
+    return True
+
+def segment_enters_sphere(x0, y0, z0, x1, y1, z1, cx, cy, cz, radius):
+    """Whether the segment (x0, y0, z0) -> (x1, y1, z1) comes within radius of (cx, cy, cz).
+
+    Also covers two moving spheres: sweep one centre against the other
+    held still, with radius the sum of both radii.
+    """
+    radius_squared = radius * radius
+    ex = x1 - cx
+    ey = y1 - cy
+    ez = z1 - cz
+    end_inside = ex * ex + ey * ey + ez * ez <= radius_squared
+    fx = x0 - cx
+    fy = y0 - cy
+    fz = z0 - cz
+    if end_inside or fx * fx + fy * fy + fz * fz <= radius_squared:
+        return end_inside
+
+    # Closest approach of the segment to the centre
+    dx = x1 - x0
+    dy = y1 - y0
+    dz = z1 - z0
+    length_squared = dx * dx + dy * dy + dz * dz
+    if length_squared == 0.0:
+        return False
+    t = -(fx * dx + fy * dy + fz * dz) / length_squared
+    if t <= 0.0 or t >= 1.0:
+        return False  # The ends are the closest points, and both are outside
+    px = fx + t * dx
+    py = fy + t * dy
+    pz = fz + t * dz
+    return px * px + py * py + pz * pz <= radius_squared
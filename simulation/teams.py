@@ -0,0 +1,10 @@
+# Team indices; arenas keep per-team lists (drones, bases, flags) in this order
+RED = 0
+BLUE = 1
+NUM_TEAMS = 2
+
+TEAM_COLORS = ((1.0, 0.0, 0.0), (0.0, 0.0, 1.0))
+
+def team_of_color(color):
+    """Team implied by an RGB colour, for objects created without an explicit team"""
+    return BLUE if color[2] > color[0] else RED
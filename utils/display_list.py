@@ -0,0 +1,29 @@
+from OpenGL.GL import *
+
+class DisplayList:
+    """Compiles immediate-mode drawing into a GL display list and replays it.
+
+    build is called once to record the geometry; it is only re-recorded when
+    the key passed to draw() changes, so callers pass whatever the geometry
+    depends on (dimensions, colours). Needs a current GL context.
+    """
+    def __init__(self, build):
+        self.build = build
+        self.list_id = None
+        self.key = None
+        
+    def draw(self, key=None):
+        if self.list_id is None or key != self.key:
+            if self.list_id is None:
+                self.list_id = glGenLists(1)
+            glNewList(self.list_id, GL_COMPILE)
+            self.build()
+            glEndList()
+            self.key = key
+        glCallList(self.list_id)
+        
+    def release(self):
+        if self.list_id is not None:
+            glDeleteLists(self.list_id, 1)
+            self.list_id = None
+            self.key = None
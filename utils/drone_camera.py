@@ -0,0 +1,31 @@
+from OpenGL.GL import *
+from OpenGL.GLU import *
+
+class DroneCamera:
+    """First-person camera that follows a drone's position and yaw"""
+    def __init__(self, drone, eye_height=0.0, look_distance=10.0):
+        self.drone = drone
+        self.eye_height = eye_height  # Offset above the drone's centre
+        self.look_distance = look_distance
+        self.up = [0.0, 1.0, 0.0]
+        
+    def eye_and_target(self):
+        # Sit just past the nose so the drone's own body is not in view
+        forward_x, forward_z = self.drone.heading()
+        nose = self.drone.size + 0.05
+        x, y, z = self.drone.position
+        eye = (x + forward_x * nose, y + self.eye_height, z + forward_z * nose)
+        target = (eye[0] + forward_x * self.look_distance, eye[1], eye[2] + forward_z * self.look_distance)
+        return eye, target
+        
+    def update(self, delta_time):
+        pass
+        
+    def apply(self):
+        # Set up the camera view in arena coordinates
+        eye, target = self.eye_and_target()
+        gluLookAt(
+            eye[0], eye[1], eye[2],
+            target[0], target[1], target[2],
+            self.up[0], self.up[1], self.up[2]
+        )
@@ -0,0 +1,54 @@
+import time
+
+import numpy as np
+
+class FrameTimer:
+    """Rolling per-phase timings over the last window frames.
+
+    Call start_frame(), then lap(i) at the end of phase i, then end_frame().
+    A frame's total is measured from start to end, so it also covers any
+    time not assigned to a phase.
+    """
+    def __init__(self, phases, window=300):
+        self.phases = list(phases)
+        self.window = window
+        self.samples = np.zeros((window, len(self.phases) + 1))  # Seconds; last column is the frame total
+        self.count = 0  # Frames recorded so far
+        self._current = np.zeros(len(self.phases) + 1)
+        self._frame_start = self._last = 0.0
+        
+    def start_frame(self):
+        self._frame_start = self._last = time.perf_counter()
+        
+    def lap(self, index):
+        now = time.perf_counter()
+        self._current[index] = now - self._last
+        self._last = now
+        
+    def end_frame(self):
+        self._current[-1] = time.perf_counter() - self._frame_start
+        self.samples[self.count % self.window] = self._current
+        self._current.fill(0.0)
+        self.count += 1
+        
+    def _recent(self):
+        # Valid rows, oldest first
+        if self.count < self.window:
+            return self.samples[:self.count]
+        return np.roll(self.samples, -(self.count % self.window), axis=0)
+        
+    def stats(self):
+        """{name: (mean, p95, p99, max)} in milliseconds, for every phase and 'frame'"""
+        recent = self._recent()
+        if not len(recent):
+            return {}
+        ms = recent * 1000.0
+        mean = ms.mean(axis=0)
+        p95, p99 = np.percentile(ms, [95, 99], axis=0)
+        peak = ms.max(axis=0)
+        names = self.phases + ['frame']
+        return {name: (mean[i], p95[i], p99[i], peak[i]) for i, name in enumerate(names)}
+        
+    def frame_times(self):
+        """Total frame times of the window in milliseconds, oldest first"""
+        return self._recent()[:, -1] * 1000.0
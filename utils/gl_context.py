@@ -0,0 +1,49 @@
+import ctypes
+import os
+
+def create_offscreen_context(width=1, height=1):
+    """Make a GL context current without showing a window.
+
+    With PYOPENGL_PLATFORM=egl (set before OpenGL is first imported) this uses
+    an EGL pbuffer, which also works on machines with no display (add
+    EGL_PLATFORM=surfaceless for Mesa). Otherwise it opens a hidden pygame
+    window. Rendering should go to a framebuffer object either way.
+    """
+    if os.environ.get('PYOPENGL_PLATFORM') == 'egl':
+        return _create_egl_context(width, height)
+    
+    import pygame
+    pygame.display.init()
+    pygame.display.set_mode((width, height), pygame.OPENGL | pygame.DOUBLEBUF | pygame.HIDDEN)
+    return None
+
+def _create_egl_context(width, height):
+    from OpenGL import EGL
+    
+    display = EGL.eglGetDisplay(EGL.EGL_DEFAULT_DISPLAY)
+    major, minor = EGL.EGLint(), EGL.EGLint()
+    EGL.eglInitialize(display, ctypes.pointer(major), ctypes.pointer(minor))
+    
+    config_attribs = (EGL.EGLint * 13)(
+        EGL.EGL_SURFACE_TYPE, EGL.EGL_PBUFFER_BIT,
+        EGL.EGL_RED_SIZE, 8,
+        EGL.EGL_GREEN_SIZE, 8,
+        EGL.EGL_BLUE_SIZE, 8,
+        EGL.EGL_DEPTH_SIZE, 24,
+        EGL.EGL_RENDERABLE_TYPE, EGL.EGL_OPENGL_BIT,
+        EGL.EGL_NONE,
+    )
+    config = EGL.EGLConfig()
+    num_configs = EGL.EGLint()
+    EGL.eglChooseConfig(display, config_attribs, ctypes.pointer(config), 1, ctypes.pointer(num_configs))
+    if num_configs.value == 0:
+        raise RuntimeError("No EGL config supports desktop OpenGL pbuffers")
+    
+    surface_attribs = (EGL.EGLint * 5)(EGL.EGL_WIDTH, width, EGL.EGL_HEIGHT, height, EGL.EGL_NONE)
+    surface = EGL.eglCreatePbufferSurface(display, config, surface_attribs)
+    
+    # Desktop GL (compatibility profile), since the scene uses the fixed-function pipeline
+    EGL.eglBindAPI(EGL.EGL_OPENGL_API)
+    context = EGL.eglCreateContext(display, config, EGL.EGL_NO_CONTEXT, None)
+    EGL.eglMakeCurrent(display, surface, surface, context)
+    return display, surface, context
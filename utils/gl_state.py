@@ -0,0 +1,51 @@
+from OpenGL.GL import *
+
+class GLState:
+    """Shadow copy of the GL state the game toggles, so redundant calls are skipped.
+
+    Only state changed through this object is tracked; call invalidate() after
+    code that changes it behind our back (e.g. glPopAttrib).
+    """
+    def __init__(self):
+        self.invalidate()
+        
+    def invalidate(self):
+        self.caps = {}
+        self.current_polygon_mode = None
+        self.current_line_width = None
+        self.current_blend_func = None
+        
+    def enable(self, cap):
+        if self.caps.get(cap) is not True:
+            glEnable(cap)
+            self.caps[cap] = True
+            
+    def disable(self, cap):
+        if self.caps.get(cap) is not False:
+            glDisable(cap)
+            self.caps[cap] = False
+            
+    def set_enabled(self, cap, enabled):
+        if enabled:
+            self.enable(cap)
+        else:
+            self.disable(cap)
+            
+    def polygon_mode(self, mode):
+        # The game only ever sets both faces at once
+        if self.current_polygon_mode != mode:
+            glPolygonMode(GL_FRONT_AND_BACK, mode)
+            self.current_polygon_mode = mode
+            
+    def line_width(self, width):
+        if self.current_line_width != width:
+            glLineWidth(width)
+            self.current_line_width = width
+            
+    def blend_func(self, src, dst):
+        if self.current_blend_func != (src, dst):
+            glBlendFunc(src, dst)
+            self.current_blend_func = (src, dst)
+
+# There is one GL context, so there is one shared tracker
+gl_state = GLState()
@@ -0,0 +1,233 @@
+from OpenGL.GL import *
+from OpenGL.GL import shaders
+from OpenGL.GL.ARB.instanced_arrays import glVertexAttribDivisorARB
+from OpenGL.GL.ARB.draw_instanced import glDrawArraysInstancedARB
+from OpenGL.extensions import alternate
+import ctypes
+
+import numpy as np
+
+from .gl_state import gl_state
+
+# Core entry points with the ARB versions as fallback for legacy contexts
+glVertexAttribDivisor = alternate('glVertexAttribDivisor', glVertexAttribDivisor, glVertexAttribDivisorARB)
+glDrawArraysInstanced = alternate('glDrawArraysInstanced', glDrawArraysInstanced, glDrawArraysInstancedARB)
+
+# Per-instance record: x, y, z, yaw in degrees, r, g, b
+INSTANCE_FIELDS = 7
+
+VERTEX_SHADER = """
+#version 120
+attribute vec3 a_position;
+attribute vec3 a_color;
+attribute float a_tint;        // 0 = use a_color, 1 = use the instance colour
+attribute vec4 a_pose;         // Per instance: x, y, z, yaw (degrees)
+attribute vec3 a_instance_color;
+uniform bool u_outline;
+varying vec3 v_color;
+
+void main() {
+    // Same rotation as glRotatef(yaw, 0, 1, 0) in GameObject.apply_transformations
+    float yaw = radians(a_pose.w);
+    float s = sin(yaw);
+    float c = cos(yaw);
+    vec3 p = vec3(c * a_position.x + s * a_position.z,
+                  a_position.y,
+                  -s * a_position.x + c * a_position.z);
+    gl_Position = gl_ModelViewProjectionMatrix * vec4(p + a_pose.xyz, 1.0);
+    v_color = u_outline ? vec3(0.0) : mix(a_color, a_instance_color, a_tint);
+}
+"""
+
+FRAGMENT_SHADER = """
+#version 120
+varying vec3 v_color;
+
+void main() {
+    gl_FragColor = vec4(v_color, 1.0);
+}
+"""
+
+class InstancedMesh:
+    """Static fill/outline geometry for one kind of object, drawn once per instance.
+
+    fill is a list of (vertex, color, tint) triangles vertices; tint 1 takes
+    the per-instance colour, tint 0 keeps the vertex colour. outline is a list
+    of triangle vertices drawn as black lines.
+    """
+    def __init__(self, fill, outline, line_width=2.0):
+        self.fill = np.array([list(v) + list(c) + [t] for v, c, t in fill], dtype=np.float32)
+        self.outline = np.array(outline, dtype=np.float32)
+        self.line_width = line_width
+        self.fill_vbo = None
+        self.outline_vbo = None
+        self.instance_vbo = None
+        self.instance_capacity = 0
+        self.instance_count = 0
+    
+    def upload(self):
+        self.fill_vbo, self.outline_vbo, self.instance_vbo = glGenBuffers(3)
+        glBindBuffer(GL_ARRAY_BUFFER, self.fill_vbo)
+        glBufferData(GL_ARRAY_BUFFER, self.fill.nbytes, self.fill, GL_STATIC_DRAW)
+        glBindBuffer(GL_ARRAY_BUFFER, self.outline_vbo)
+        glBufferData(GL_ARRAY_BUFFER, self.outline.nbytes, self.outline, GL_STATIC_DRAW)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+    
+    def release(self):
+        if self.fill_vbo is not None:
+            glDeleteBuffers(3, [self.fill_vbo, self.outline_vbo, self.instance_vbo])
+            self.fill_vbo = self.outline_vbo = self.instance_vbo = None
+            self.instance_capacity = 0
+
+def drone_mesh(drone):
+    triangles = drone.triangles()
+    return InstancedMesh(
+        fill=[(v, (0.0, 0.0, 0.0), 1.0) for v in triangles],
+        outline=triangles,
+    )
+
+def flag_mesh(flag):
+    # Split each pole quad into two triangles
+    quads = flag.pole_quads()
+    pole = []
+    for i in range(0, len(quads), 4):
+        a, b, c, d = quads[i:i + 4]
+        pole += [a, b, c, a, c, d]
+    pennant = flag.pennant_triangle()
+    return InstancedMesh(
+        fill=[(v, flag.pole_color, 0.0) for v in pole] +
+             [(v, (0.0, 0.0, 0.0), 1.0) for v in pennant],
+        outline=pennant,
+    )
+
+class InstancedRenderer:
+    """Draws every instance of a mesh with one fill call and one outline call.
+
+    Instances come from a contiguous float32 array of shape (n, 7) holding
+    x, y, z, yaw, r, g, b per object (see write_instances); it is uploaded
+    once per draw. Uses the fixed-function modelview/projection matrices, so
+    it slots into Environment.draw under the same camera transforms.
+    """
+    def __init__(self):
+        self.program = None
+        self.meshes = {}
+    
+    def add_mesh(self, name, mesh):
+        self.meshes[name] = mesh
+        if self.program is not None:
+            mesh.upload()
+    
+    def _init_gl(self):
+        self.program = shaders.compileProgram(
+            shaders.compileShader(VERTEX_SHADER, GL_VERTEX_SHADER),
+            shaders.compileShader(FRAGMENT_SHADER, GL_FRAGMENT_SHADER),
+            validate=False,
+        )
+        self.attribs = {name: glGetAttribLocation(self.program, name)
+                        for name in ('a_position', 'a_color', 'a_tint', 'a_pose', 'a_instance_color')}
+        self.u_outline = glGetUniformLocation(self.program, 'u_outline')
+        for mesh in self.meshes.values():
+            mesh.upload()
+    
+    def upload(self, name, instances, count=None):
+        """Upload count rows (all by default) of instances for the named mesh"""
+        if count is None:
+            count = len(instances)
+        if self.program is None:
+            self._init_gl()
+        mesh = self.meshes[name]
+        mesh.instance_count = count
+        if count == 0:
+            return
+        instances = np.ascontiguousarray(instances[:count], dtype=np.float32)
+        glBindBuffer(GL_ARRAY_BUFFER, mesh.instance_vbo)
+        if count > mesh.instance_capacity:
+            mesh.instance_capacity = max(count, 2 * mesh.instance_capacity)
+            glBufferData(GL_ARRAY_BUFFER, mesh.instance_capacity * INSTANCE_FIELDS * 4, None, GL_STREAM_DRAW)
+        glBufferSubData(GL_ARRAY_BUFFER, 0, instances.nbytes, instances)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+    
+    def draw(self, name, instances, count=None):
+        """Upload and draw fill then outline, managing polygon mode and line width itself"""
+        self.upload(name, instances, count)
+        self.draw_fill(name)
+        gl_state.line_width(self.meshes[name].line_width)
+        gl_state.polygon_mode(GL_LINE)
+        self.draw_outline(name)
+        gl_state.polygon_mode(GL_FILL)
+    
+    def draw_fill(self, name):
+        """Draw the uploaded instances' fill; expects polygon mode GL_FILL"""
+        mesh = self.meshes[name]
+        if not mesh.instance_count:
+            return
+        attribs = self.attribs
+        self._begin(mesh, outline=False)
+        stride = 7 * 4
+        glBindBuffer(GL_ARRAY_BUFFER, mesh.fill_vbo)
+        glVertexAttribPointer(attribs['a_position'], 3, GL_FLOAT, GL_FALSE, stride, ctypes.c_void_p(0))
+        glVertexAttribPointer(attribs['a_color'], 3, GL_FLOAT, GL_FALSE, stride, ctypes.c_void_p(12))
+        glVertexAttribPointer(attribs['a_tint'], 1, GL_FLOAT, GL_FALSE, stride, ctypes.c_void_p(24))
+        glEnableVertexAttribArray(attribs['a_color'])
+        glEnableVertexAttribArray(attribs['a_tint'])
+        glDrawArraysInstanced(GL_TRIANGLES, 0, len(mesh.fill), mesh.instance_count)
+        glDisableVertexAttribArray(attribs['a_color'])
+        glDisableVertexAttribArray(attribs['a_tint'])
+        self._end()
+    
+    def draw_outline(self, name):
+        """Draw the uploaded instances' outline; expects polygon mode GL_LINE"""
+        mesh = self.meshes[name]
+        if not mesh.instance_count:
+            return
+        self._begin(mesh, outline=True)
+        glBindBuffer(GL_ARRAY_BUFFER, mesh.outline_vbo)
+        glVertexAttribPointer(self.attribs['a_position'], 3, GL_FLOAT, GL_FALSE, 0, ctypes.c_void_p(0))
+        glDrawArraysInstanced(GL_TRIANGLES, 0, len(mesh.outline), mesh.instance_count)
+        self._end()
+    
+    def _begin(self, mesh, outline):
+        attribs = self.attribs
+        stride = INSTANCE_FIELDS * 4
+        glUseProgram(self.program)
+        glUniform1i(self.u_outline, int(outline))
+        glBindBuffer(GL_ARRAY_BUFFER, mesh.instance_vbo)
+        glVertexAttribPointer(attribs['a_pose'], 4, GL_FLOAT, GL_FALSE, stride, ctypes.c_void_p(0))
+        glVertexAttribPointer(attribs['a_instance_color'], 3, GL_FLOAT, GL_FALSE, stride, ctypes.c_void_p(16))
+        for attr in ('a_pose', 'a_instance_color'):
+            glEnableVertexAttribArray(attribs[attr])
+            glVertexAttribDivisor(attribs[attr], 1)
+        glEnableVertexAttribArray(attribs['a_position'])
+    
+    def _end(self):
+        # Leave the fixed-function pipeline as we found it
+        attribs = self.attribs
+        for attr in ('a_pose', 'a_instance_color'):
+            glVertexAttribDivisor(attribs[attr], 0)
+            glDisableVertexAttribArray(attribs[attr])
+        glDisableVertexAttribArray(attribs['a_position'])
+        glUseProgram(0)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+    
+    def release(self):
+        for mesh in self.meshes.values():
+            mesh.release()
+        if self.program is not None:
+            glDeleteProgram(self.program)
+            self.program = None
+
+def write_instances(out, objects):
+    """Fill rows of out with the pose and colour of each GameObject; returns the count"""
+    for i, obj in enumerate(objects):
+        row = out[i]
+        row[0:3] = obj.position
+        row[3] = obj.rotation[1]
+        row[4:7] = obj.color[:3]
+    return len(objects)
+
+def write_pose_instances(out, positions, rotations):
+    """Refresh only the pose columns of out from EntityRegistry rows; returns the count"""
+    count = len(positions)
+    out[:count, 0:3] = positions
+    out[:count, 3] = rotations[:, 1]
+    return count
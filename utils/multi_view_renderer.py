@@ -0,0 +1,46 @@
+from OpenGL.GL import *
+from OpenGL.GLU import *
+
+from .drone_camera import DroneCamera
+from .gl_state import gl_state
+from .offscreen_renderer import OffscreenRenderer
+
+class MultiViewRenderer(OffscreenRenderer):
+    """Renders every drone's first-person view into side-by-side tiles of one framebuffer.
+
+    The scene is queued once per frame (instance data uploaded once, display
+    lists shared) and the same render queue is replayed into each tile's
+    viewport, then the whole atlas comes back in a single PBO readback.
+    views() splits a returned frame into per-drone images without copying.
+    """
+    def __init__(self, cameras, tile_width=64, tile_height=64, fov=90, **kwargs):
+        self.cameras = list(cameras)
+        self.tile_width = tile_width
+        self.tile_height = tile_height
+        super().__init__(tile_width * len(self.cameras), tile_height, fov=fov, **kwargs)
+        
+    @classmethod
+    def for_drones(cls, drones, **kwargs):
+        return cls([DroneCamera(drone) for drone in drones], **kwargs)
+        
+    def _draw_views(self, environment):
+        queue = environment.queue_scene()
+        gl_state.enable(GL_SCISSOR_TEST)
+        for i, camera in enumerate(self.cameras):
+            x = i * self.tile_width
+            glViewport(x, 0, self.tile_width, self.tile_height)
+            glScissor(x, 0, self.tile_width, self.tile_height)
+            self._set_projection(self.tile_width / self.tile_height)
+            camera.apply()
+            
+            # Cameras work in arena space, so skip the interactive mouse rotation
+            glPushMatrix()
+            environment.apply_transformations()
+            queue.flush(clear=False)
+            glPopMatrix()
+        gl_state.disable(GL_SCISSOR_TEST)
+        queue.clear()
+        
+    def views(self, frame):
+        """(num_cameras, tile_height, tile_width, 3) view of an atlas frame"""
+        return frame.reshape(self.tile_height, len(self.cameras), self.tile_width, 3).swapaxes(0, 1)
@@ -0,0 +1,140 @@
+from OpenGL.GL import *
+from OpenGL.GLU import *
+import ctypes
+
+import numpy as np
+
+from .camera import Camera
+from .gl_state import gl_state
+
+class OffscreenRenderer:
+    """Renders an Environment into a framebuffer object and reads it back as uint8 RGB.
+
+    Readback goes through two pixel buffer objects used in turn: render()
+    queues an asynchronous glReadPixels of the new frame into one PBO and maps
+    the other, which holds the previous frame. The copy of frame t therefore
+    overlaps rendering of frame t+1, and render() returns frame t-1 (None on
+    the first call). Use render_sync() when latency matters more than speed.
+    Needs a current GL context; see utils.gl_context.
+    """
+    def __init__(self, width=84, height=84, camera=None, background=(1.0, 1.0, 1.0, 1.0), fov=45):
+        self.width = width
+        self.height = height
+        self.camera = camera if camera is not None else Camera()
+        self.fov = fov
+        self.background = background
+        self.frame_size = width * height * 3
+        
+        # The returned frame is reused between calls; copy it to keep it
+        self.frame = np.zeros((height, width, 3), dtype=np.uint8)
+        
+        self._create_framebuffer()
+        self.pbos = glGenBuffers(2)
+        for pbo in self.pbos:
+            glBindBuffer(GL_PIXEL_PACK_BUFFER, pbo)
+            glBufferData(GL_PIXEL_PACK_BUFFER, self.frame_size, None, GL_STREAM_READ)
+        glBindBuffer(GL_PIXEL_PACK_BUFFER, 0)
+        self.frame_index = 0
+        self.pending = False  # True once a PBO holds a frame not yet returned
+    
+    def _create_framebuffer(self):
+        self.fbo = glGenFramebuffers(1)
+        self.color_rb, self.depth_rb = glGenRenderbuffers(2)
+        
+        glBindRenderbuffer(GL_RENDERBUFFER, self.color_rb)
+        glRenderbufferStorage(GL_RENDERBUFFER, GL_RGBA8, self.width, self.height)
+        glBindRenderbuffer(GL_RENDERBUFFER, self.depth_rb)
+        glRenderbufferStorage(GL_RENDERBUFFER, GL_DEPTH_COMPONENT24, self.width, self.height)
+        glBindRenderbuffer(GL_RENDERBUFFER, 0)
+        
+        glBindFramebuffer(GL_FRAMEBUFFER, self.fbo)
+        glFramebufferRenderbuffer(GL_FRAMEBUFFER, GL_COLOR_ATTACHMENT0, GL_RENDERBUFFER, self.color_rb)
+        glFramebufferRenderbuffer(GL_FRAMEBUFFER, GL_DEPTH_ATTACHMENT, GL_RENDERBUFFER, self.depth_rb)
+        status = glCheckFramebufferStatus(GL_FRAMEBUFFER)
+        glBindFramebuffer(GL_FRAMEBUFFER, 0)
+        if status != GL_FRAMEBUFFER_COMPLETE:
+            raise RuntimeError(f"Offscreen framebuffer incomplete (status {status:#x})")
+    
+    def _draw_scene(self, environment):
+        previous_viewport = glGetIntegerv(GL_VIEWPORT)
+        glBindFramebuffer(GL_FRAMEBUFFER, self.fbo)
+        glViewport(0, 0, self.width, self.height)
+        glClearColor(*self.background)
+        gl_state.enable(GL_DEPTH_TEST)
+        glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
+        
+        glMatrixMode(GL_PROJECTION)
+        glPushMatrix()
+        glMatrixMode(GL_MODELVIEW)
+        glPushMatrix()
+        self._draw_views(environment)
+        glMatrixMode(GL_PROJECTION)
+        glPopMatrix()
+        glMatrixMode(GL_MODELVIEW)
+        glPopMatrix()
+        return previous_viewport
+    
+    def _set_projection(self, aspect):
+        # Same projection as Game.setup_gl, at the given aspect ratio
+        glMatrixMode(GL_PROJECTION)
+        glLoadIdentity()
+        gluPerspective(self.fov, aspect, 0.1, 100.0)
+        glMatrixMode(GL_MODELVIEW)
+        glLoadIdentity()
+    
+    def _draw_views(self, environment):
+        self._set_projection(self.width / self.height)
+        self.camera.apply()
+        environment.draw()
+    
+    def _finish_scene(self, previous_viewport):
+        glBindFramebuffer(GL_FRAMEBUFFER, 0)
+        glViewport(*previous_viewport)
+    
+    def render(self, environment):
+        """Render a frame and return the previous one (None if there is none yet)"""
+        previous_viewport = self._draw_scene(environment)
+        
+        # Queue the readback of this frame; the call returns without waiting
+        glPixelStorei(GL_PACK_ALIGNMENT, 1)
+        glBindBuffer(GL_PIXEL_PACK_BUFFER, self.pbos[self.frame_index])
+        glReadPixels(0, 0, self.width, self.height, GL_RGB, GL_UNSIGNED_BYTE, ctypes.c_void_p(0))
+        self._finish_scene(previous_viewport)
+        
+        # Collect the frame queued on the previous call from the other PBO
+        result = None
+        if self.pending:
+            result = self._copy_from_pbo(self.pbos[1 - self.frame_index])
+        glBindBuffer(GL_PIXEL_PACK_BUFFER, 0)
+        
+        self.pending = True
+        self.frame_index = 1 - self.frame_index
+        return result
+    
+    def flush(self):
+        """Return the frame still held in a PBO after the last render(), if any"""
+        if not self.pending:
+            return None
+        result = self._copy_from_pbo(self.pbos[1 - self.frame_index])
+        glBindBuffer(GL_PIXEL_PACK_BUFFER, 0)
+        self.pending = False
+        return result
+    
+    def render_sync(self, environment):
+        """Render a frame and wait for its pixels (stalls the pipeline)"""
+        self.render(environment)
+        return self.flush()
+    
+    def _copy_from_pbo(self, pbo):
+        glBindBuffer(GL_PIXEL_PACK_BUFFER, pbo)
+        ptr = glMapBufferRange(GL_PIXEL_PACK_BUFFER, 0, self.frame_size, GL_MAP_READ_BIT)
+        pixels = np.ctypeslib.as_array((ctypes.c_ubyte * self.frame_size).from_address(ptr))
+        # GL rows start at the bottom; flip so row 0 is the top of the image
+        np.copyto(self.frame, pixels.reshape(self.height, self.width, 3)[::-1])
+        glUnmapBuffer(GL_PIXEL_PACK_BUFFER)
+        return self.frame
+    
+    def release(self):
+        glDeleteBuffers(2, self.pbos)
+        glDeleteRenderbuffers(2, [self.color_rb, self.depth_rb])
+        glDeleteFramebuffers(1, [self.fbo])
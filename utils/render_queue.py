@@ -0,0 +1,71 @@
+from OpenGL.GL import *
+from .gl_state import gl_state
+
+# Passes run in this order; each fixes lighting, blending and polygon mode
+FILL_PASS = 0
+OUTLINE_PASS = 1
+TRANSLUCENT_PASS = 2
+TRANSLUCENT_OUTLINE_PASS = 3
+
+PASS_STATE = {
+    # pass: (blend enabled, polygon mode)
+    FILL_PASS: (False, GL_FILL),
+    OUTLINE_PASS: (False, GL_LINE),
+    TRANSLUCENT_PASS: (True, GL_FILL),
+    TRANSLUCENT_OUTLINE_PASS: (True, GL_LINE),
+}
+
+class RenderQueue:
+    """Per-frame draw list sorted by GL state.
+
+    Opaque fills are drawn first, then opaque outlines, then translucent
+    objects, so lighting, polygon mode, blending and line width each change
+    once per pass instead of once per object. Submission order is kept
+    within a pass and line width.
+    """
+    def __init__(self, state=gl_state):
+        self.state = state
+        self.items = []
+        
+    def clear(self):
+        self.items.clear()
+        
+    def add(self, draw_pass, draw_fn, *args, line_width=0.0, transform=None):
+        """Queue draw_fn(*args), optionally under transform's apply_transformations()"""
+        self.items.append((draw_pass, line_width, len(self.items), transform, draw_fn, args))
+        
+    def add_object(self, obj):
+        """Queue a GameObject's fill and outline in the passes it belongs to"""
+        fill_pass = TRANSLUCENT_PASS if obj.translucent else FILL_PASS
+        self.add(fill_pass, obj.draw_fill, transform=obj)
+        self.add(fill_pass + 1, obj.draw_outline, line_width=obj.outline_width, transform=obj)
+        
+    def flush(self, clear=True):
+        """Draw the queued items; pass clear=False to keep them for another view"""
+        state = self.state
+        self.items.sort(key=lambda item: item[:3])
+        
+        # Nothing in the arena is lit
+        state.disable(GL_LIGHTING)
+        for draw_pass, line_width, _, transform, draw_fn, args in self.items:
+            blend, polygon_mode = PASS_STATE[draw_pass]
+            state.set_enabled(GL_BLEND, blend)
+            if blend:
+                state.blend_func(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
+            state.polygon_mode(polygon_mode)
+            if line_width:
+                state.line_width(line_width)
+                
+            if transform is not None:
+                glPushMatrix()
+                transform.apply_transformations()
+                draw_fn(*args)
+                glPopMatrix()
+            else:
+                draw_fn(*args)
+                
+        # Leave the defaults other drawing code expects
+        state.polygon_mode(GL_FILL)
+        state.disable(GL_BLEND)
+        if clear:
+            self.clear()
@@ -0,0 +1,115 @@
+from OpenGL.GL import *
+import numpy as np
+import pygame
+
+from .gl_state import gl_state
+
+class TimingHUD:
+    """Overlay with a FrameTimer's per-phase statistics and a frame-time graph.
+
+    Text is rendered with pygame.font and redrawn only every refresh_frames
+    frames; in between the cached pixels are blitted with glDrawPixels.
+    """
+    refresh_frames = 30
+    graph_height = 60
+    graph_max_ms = 50.0  # Frame time at the top of the graph
+    budget_ms = 1000.0 / 60  # Reference line for a 60 FPS frame
+    
+    def __init__(self, timer, screen_width, screen_height, x=10, y=10):
+        self.timer = timer
+        self.screen_width = screen_width
+        self.screen_height = screen_height
+        self.x = x
+        self.y = y
+        self.font = pygame.font.SysFont('dejavusansmono,couriernew,monospace', 16)  # Columns need a fixed pitch
+        self.line_height = self.font.get_linesize()
+        self.width = 0
+        self.lines = []  # (width, height, RGBA bytes) per text line
+        self._frames_since_refresh = self.refresh_frames
+        
+    def _refresh_text(self):
+        text = ["phase      mean    p95    p99    max  (ms)"]
+        for name, (mean, p95, p99, peak) in self.timer.stats().items():
+            text.append(f"{name:<8} {mean:6.2f} {p95:6.2f} {p99:6.2f} {peak:6.2f}")
+        self.lines = []
+        for line in text:
+            surface = self.font.render(line, True, (0, 0, 0))
+            # Flipped, since glDrawPixels fills rows from the bottom up
+            pixels = pygame.image.tostring(surface, 'RGBA', True)
+            self.lines.append((surface.get_width(), surface.get_height(), pixels))
+        self.width = max(240, max(width for width, _, _ in self.lines))
+        self._frames_since_refresh = 0
+        
+    def draw(self):
+        if self._frames_since_refresh >= self.refresh_frames:
+            self._refresh_text()
+        self._frames_since_refresh += 1
+        
+        # Same 2D setup as Game.draw_button: y grows downwards from the top
+        glMatrixMode(GL_PROJECTION)
+        glPushMatrix()
+        glLoadIdentity()
+        glOrtho(0, self.screen_width, self.screen_height, 0, -1, 1)
+        glMatrixMode(GL_MODELVIEW)
+        glPushMatrix()
+        glLoadIdentity()
+        gl_state.disable(GL_LIGHTING)
+        gl_state.disable(GL_DEPTH_TEST)
+        gl_state.polygon_mode(GL_FILL)
+        gl_state.line_width(1.0)
+        gl_state.enable(GL_BLEND)
+        gl_state.blend_func(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
+        
+        text_height = len(self.lines) * self.line_height
+        left, top = self.x, self.y
+        right = left + self.width + 8
+        graph_top = top + text_height + 8
+        graph_bottom = graph_top + self.graph_height
+        
+        # Translucent backdrop
+        glColor4f(1.0, 1.0, 1.0, 0.8)
+        glBegin(GL_QUADS)
+        glVertex2f(left, top)
+        glVertex2f(right, top)
+        glVertex2f(right, graph_bottom + 4)
+        glVertex2f(left, graph_bottom + 4)
+        glEnd()
+        
+        self._draw_graph(left + 4, right - 4, graph_top, graph_bottom)
+        
+        # Text lines, top to bottom
+        for i, (width, height, pixels) in enumerate(self.lines):
+            baseline = top + 4 + (i + 1) * self.line_height
+            glWindowPos2i(left + 4, self.screen_height - baseline)
+            glDrawPixels(width, height, GL_RGBA, GL_UNSIGNED_BYTE, pixels)
+            
+        gl_state.disable(GL_BLEND)
+        glMatrixMode(GL_PROJECTION)
+        glPopMatrix()
+        glMatrixMode(GL_MODELVIEW)
+        glPopMatrix()
+        gl_state.enable(GL_DEPTH_TEST)
+        
+    def _draw_graph(self, left, right, top, bottom):
+        scale = (bottom - top) / self.graph_max_ms
+        
+        # Frame budget reference line
+        budget_y = bottom - self.budget_ms * scale
+        glColor3f(0.0, 0.6, 0.0)
+        glBegin(GL_LINES)
+        glVertex2f(left, budget_y)
+        glVertex2f(right, budget_y)
+        glEnd()
+        
+        times = self.timer.frame_times()
+        if len(times) < 2:
+            return
+        # Newest frame at the right edge; one vertex array draw for the whole strip
+        points = np.empty((len(times), 2), dtype=np.float32)
+        points[:, 0] = np.linspace(right - (right - left) * (len(times) - 1) / (self.timer.window - 1), right, len(times))
+        points[:, 1] = bottom - np.minimum(times, self.graph_max_ms) * scale
+        glColor3f(0.8, 0.0, 0.0)
+        glEnableClientState(GL_VERTEX_ARRAY)
+        glVertexPointer(2, GL_FLOAT, 0, points)
+        glDrawArrays(GL_LINE_STRIP, 0, len(points))
+        glDisableClientState(GL_VERTEX_ARRAY)